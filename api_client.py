@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Dayanıklı API istemcisi (OpenAI uyumlu uç noktalar için).
+
+- Çağrı başına zaman aşımı
+- 429 / 5xx / bağlantı hatalarında rastgele sapmalı (jitter) üstel geri çekilme
+- Uç nokta sağlıksızken isteği hiç göndermeden hızlı hata veren devre kesici
+- Gecikme, yeniden deneme ve hata sayaçları
+"""
+import time
+import random
+import threading
+from collections import deque
+
+import openai
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Devre açıkken yapılan çağrılar bu hatayla hemen reddedilir."""
+
+class CircuitBreaker:
+    """
+    Kapalı -> (art arda failure_threshold hata) -> Açık -> (reset_timeout sonra) -> Yarı açık.
+    Yarı açıkta tek deneme isteği geçer; başarılıysa devre kapanır, değilse tekrar açılır.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+def is_retryable(error):
+    """Geçici (tekrar denenebilir) hata mı?"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in RETRYABLE_STATUS or (status is not None and status >= 500)
+
+def _retry_after(error):
+    """Sunucu Retry-After başlığı gönderdiyse bekleme süresi (sn)."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class ResilientClient:
+    def __init__(self, client, timeout=60.0, max_retries=3, backoff_base=0.5, backoff_max=20.0,
+                 breaker=None, sleep=time.sleep):
+        self.client = client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self.metrics = {"calls": 0, "successes": 0, "failures": 0, "retries": 0, "rejected": 0}
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.metrics[name] += value
+
+    def backoff_delay(self, attempt, error=None):
+        """Tam jitter'lı üstel bekleme; Retry-After varsa ondan az beklenmez."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def create(self, timeout=None, **kwargs):
+        """
+        chat.completions.create'in dayanıklı hali. stream=True ise sadece akışın
+        açılması yeniden denenir.
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise CircuitOpenError("API geçici olarak devre dışı (art arda hatalar). Lütfen biraz sonra tekrar deneyin.")
+
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(timeout=timeout or self.timeout, **kwargs)
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # 4xx istek hataları uç noktanın sağlığını göstermez
+                    self.breaker.record_success()
+
+                if retryable and attempt < self.max_retries:
+                    self._count("retries")
+                    self._sleep(self.backoff_delay(attempt, e))
+                    attempt += 1
+                    continue
+
+                self._count("failures")
+                raise
+
+            self.breaker.record_success()
+            with self._lock:
+                self.metrics["successes"] += 1
+                self._latencies.append(time.perf_counter() - start)
+            return response
+
+    def get_metrics(self):
+        """Sayaçlar + gecikme özeti (sn) + devre durumu."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = dict(self.metrics)
+        metrics["circuit_state"] = self.breaker.state
+        if latencies:
+            metrics["latency_avg"] = sum(latencies) / len(latencies)
+            metrics["latency_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return metrics
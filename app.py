@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import os
 import time
 import plotly.graph_objects as go
 import plotly.express as px
@@ -8,6 +9,8 @@ import plotly.express as px
 import db_manager
 import grok_service
 import image_utils  # Bulanıklık kontrolü için şart
+import image_store
+import session_store
 
 # -----------------------------------------------------------------------------
 # 1. SAYFA VE TASARIM AYARLARI
@@ -99,10 +102,16 @@ if 'student_gender' not in st.session_state:
     st.session_state['student_gender'] = "Belirtilmemiş"
 
 # Geçici Resim Klasörü (Toplu Yükleme İçin)
+# Resimler diskteki oturum klasöründe durur; hafızada yalnızca tanıtıcı ve küçük önizleme kalır
 if 'finger_folder' not in st.session_state:
-    st.session_state['finger_folder'] = {}
-
-# Sonuçlar
+    session_store.cleanup_expired()
+    st.session_state['finger_folder'] = session_store.SessionImages()
+# Resim klasöre eklenince yükleyici sıfırlanır (Streamlit yüklenen dosyayı hafızada tutmasın)
+if 'uploader_nonce' not in st.session_state:
+    st.session_state['uploader_nonce'] = 0
+
+# Sonuçlar: Eksik kalan bir analizde başarılı parmakların sonuçları burada bekler
+# ({finger_code: {"digest", "result"}}); tüm set tamamlanmadan veritabanına yazılmaz
 if 'results' not in st.session_state:
     st.session_state['results'] = {}
 
@@ -136,19 +145,18 @@ def logout():
     """Çıkış yapar ve hafızayı temizler."""
     st.session_state['auth_status'] = None
     st.session_state['current_user'] = None
-    st.session_state['finger_folder'] = {}
+    st.session_state['finger_folder'].clear()
     st.session_state['results'] = {}
     st.rerun()
 
 # -----------------------------------------------------------------------------
 # 4. GÖRSELLEŞTİRME FONKSİYONU (PLOTLY DASHBOARD)
 # -----------------------------------------------------------------------------
-def render_dmit_dashboard(scores):
+def build_dashboard_figures(scores):
     """
-    Öğrenci puanlarını alıp Plotly ile profesyonel grafikler çizer.
+    Öğrenci puanlarından Plotly grafiklerini oluşturur (ekrana basmaz).
+    Dönüş: (fig_gauge, fig_radar, fig_bar)
     """
-    if not scores: return
-
     # --- VERİ HAZIRLIĞI ---
     lobes = scores.get("lobes", {})
     tfrc = scores.get("tfrc", 100)
@@ -213,6 +221,15 @@ def render_dmit_dashboard(scores):
         textposition='auto'
     ))
     fig_bar.update_layout(title="Yetenek Alanları Puanı", margin=dict(t=30, b=30, l=30, r=30))
+    return fig_gauge, fig_radar, fig_bar
+
+def render_dmit_dashboard(scores, figures=None):
+    """
+    Öğrenci puanlarını alıp Plotly ile profesyonel grafikler çizer.
+    figures verilirse (önbellekten) grafikler yeniden oluşturulmaz.
+    """
+    if not scores: return
+    fig_gauge, fig_radar, fig_bar = figures or build_dashboard_figures(scores)
 
     # --- GRAFİKLERİ EKRANA BAS ---
     st.markdown("### 📊 Görsel Analiz Özeti")
@@ -226,6 +243,36 @@ def render_dmit_dashboard(scores):
     st.plotly_chart(fig_bar, use_container_width=True)
     st.markdown("---")
 
+# -----------------------------------------------------------------------------
+# 4B. ÖNBELLEK KATMANI (Öğretmen paneli)
+# -----------------------------------------------------------------------------
+# Anahtarlar db_manager.data_version() içerir: Yazma olunca sürüm artar ve kayıtlar
+# yeniden hesaplanır; değişiklik yoksa panelde gezinmek SQLite'a dokunmaz.
+# TTL, başka süreçlerin (ör. reanalyze.py) yazdıkları için güvenlik ağıdır.
+# Rapor geçmişi yalnızca db_manager.report_version() ile anahtarlanır (rapor kaydı diğerlerini bozmaz).
+CACHE_TTL_SECONDS = int(os.getenv("DMIT_UI_CACHE_TTL_SECONDS", "600"))
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_student_page(search, page, version):
+    return db_manager.list_students(search, page=page)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False, max_entries=256)
+def cached_student_data(student_name, version):
+    return db_manager.get_student_data(student_name)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False, max_entries=256)
+def cached_student_scores(student_name, version):
+    return db_manager.get_student_scores(student_name, cached_student_data(student_name, version))
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False, max_entries=64)
+def cached_report_history(student_name, version):
+    return db_manager.list_reports(student_name)
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, show_spinner=False, max_entries=64)
+def cached_dashboard_figures(student_name, version):
+    # Plotly nesneleri kopyalanmadan paylaşılır (yalnızca okunur)
+    return build_dashboard_figures(cached_student_scores(student_name, version).get("dashboard", {}))
+
 # -----------------------------------------------------------------------------
 # 5. ANA UYGULAMA AKIŞI
 # -----------------------------------------------------------------------------
@@ -360,19 +407,24 @@ def main():
             input_method = st.radio("2. Yöntem Seçiniz:", ("📁 Galeri / Dosya", "📸 Kamera"), horizontal=True)
             
             uploaded_file = None
+            nonce = st.session_state['uploader_nonce']
             if input_method == "📁 Galeri / Dosya":
-                uploaded_file = st.file_uploader(f"{fingers_names[selected_finger_code]} Yükle", type=['png', 'jpg', 'jpeg'], key=f"up_{selected_finger_code}")
+                uploaded_file = st.file_uploader(f"{fingers_names[selected_finger_code]} Yükle", type=['png', 'jpg', 'jpeg'], key=f"up_{selected_finger_code}_{nonce}")
             else:
-                uploaded_file = st.camera_input(f"{fingers_names[selected_finger_code]} Çek", key=f"cam_{selected_finger_code}")
+                uploaded_file = st.camera_input(f"{fingers_names[selected_finger_code]} Çek", key=f"cam_{selected_finger_code}_{nonce}")
 
             # 3. Klasöre Ekleme İşlemi (BULANIKLIK KONTROLÜ İLE)
             if uploaded_file:
-                st.image(uploaded_file, width=150, caption="Önizleme")
                 img_bytes = uploaded_file.getvalue()
+                # Önizleme küçük JPEG ile gösterilir (tam çözünürlüklü resim tarayıcıya tekrar gönderilmez)
+                st.image(session_store.make_thumbnail(img_bytes) or img_bytes, width=150, caption="Önizleme")
 
                 # --- YENİ: DEDEKTİF (BULANIKLIK KONTROLÜ) ---
                 # image_utils.py içinde check_image_quality fonksiyonu olmalı
                 is_ok, score, msg = image_utils.check_image_quality(img_bytes)
+                if is_ok and msg != image_utils.QUALITY_OK_MESSAGE:
+                    # Uyarı modu (QUALITY_GATE_MODE=warn): Resim kabul edilir, kullanıcı yeniden çekmeyi seçebilir
+                    st.warning(msg)
 
                 if st.button(f"📂 {fingers_names[selected_finger_code]} Resmini Klasöre Koy", type="secondary", use_container_width=True):
                     if not is_ok:
@@ -381,9 +433,12 @@ def main():
                     else:
                         # Net ise kaydet
                         st.session_state['finger_folder'][selected_finger_code] = img_bytes
+                        st.session_state['uploader_nonce'] += 1
                         st.success(f"✅ Eklendi! (Netlik Puanı: {int(score)})")
                         time.sleep(0.5)
                         st.rerun()
+            elif st.session_state['finger_folder'].thumbnail(selected_finger_code):
+                st.image(st.session_state['finger_folder'].thumbnail(selected_finger_code), width=150, caption="Klasördeki resim")
 
         with col_right:
             st.markdown("### 🏁 İşlemi Tamamla")
@@ -406,37 +461,57 @@ def main():
                     s_age = st.session_state['student_age']
                     s_gender = st.session_state['student_gender']
                     
-                    # DÖNGÜ: Her bir resmi sırayla işle
-                    for i, (f_code, img_bytes) in enumerate(st.session_state['finger_folder'].items()):
-                        
-                        status_text.text(f"⏳ İşleniyor: {fingers_names[f_code]} (Grok Vision + OpenCV)...")
-                        
-                        # 1. Analiz Et (Grok Service)
-                        result = grok_service.analyze_fingerprint(img_bytes, f_code)
-                        
-                        # 2. Veritabanına Kaydet
-                        db_manager.add_fingerprint_record(
-                            student_name=student_full_name,
-                            student_age=s_age,
-                            student_gender=s_gender,
-                            finger_code=f_code,
-                            image_path="memory",
-                            pattern_type=result.get("type", "Unknown"),
-                            ridge_count=result.get("rc", 0),
-                            confidence=result.get("confidence", "Low"),
-                            dmit_insight=result.get("dmit_insight", "")
-                        )
-                        
-                        progress_bar.progress((i + 1) / 10)
-                        time.sleep(0.2) 
-                    
+                    # 1. Analiz Et (Grok Service) - 10 parmak eşzamanlı
+                    def on_finger_done(f_code, result, done, total):
+                        status_text.text(f"⏳ Tamamlandı: {fingers_names[f_code]} ({done}/{total}) (Grok Vision + OpenCV)...")
+                        progress_bar.progress(done / total)
+
+                    # Resimler yalnızca analiz süresince diskten hafızaya alınır
+                    finger_images = st.session_state['finger_folder'].load_all()
+                    digests = {f_code: grok_service.image_digest(data) for f_code, data in finger_images.items()}
+
+                    # Önceki denemede başarılı olan (ve resmi değişmeyen) parmaklar tekrar analiz edilmez
+                    pending = {f_code: entry["result"] for f_code, entry in st.session_state['results'].items()
+                               if digests.get(f_code) == entry["digest"]}
+                    to_analyze = {f_code: data for f_code, data in finger_images.items() if f_code not in pending}
+                    status_text.text(f"⏳ {len(to_analyze)} parmak aynı anda işleniyor (Grok Vision + OpenCV)...")
+                    results = dict(pending, **grok_service.analyze_fingers_concurrently(
+                        to_analyze,
+                        progress_callback=on_finger_done
+                    ))
+
+                    # 2. Veritabanına Kaydet: Yalnızca 10 parmağın hepsi başarılıysa (yarım set yazılmaz)
+                    failed_fingers = [fingers_names[f_code] for f_code, result in results.items()
+                                      if grok_service.is_failed_result(result)]
+                    succeeded = {f_code: result for f_code, result in results.items()
+                                 if not grok_service.is_failed_result(result)}
+
                     progress_bar.empty()
                     status_text.empty()
+
+                    if failed_fingers:
+                        # Hiçbir şey yazılmaz (öğrenci kaydı da açılmaz); başarılı sonuçlar oturumda bekler,
+                        # tekrar denemede yalnızca başarısız parmaklar analiz edilir
+                        st.session_state['results'] = {f_code: {"digest": digests[f_code], "result": result}
+                                                       for f_code, result in succeeded.items()}
+                        st.error(f"⚠️ Şu parmaklar analiz edilemedi: {', '.join(failed_fingers)}. Lütfen birazdan analizi tekrar başlatın.")
+                        st.stop()
+
+                    # Orijinal ve iskelet resimleri içerik adresli depoya yazılır (yeniden analiz için)
+                    image_refs = image_store.store_finger_set(finger_images)
+
+                    # 10 parmak tek işlemde (tek commit) yazılır
+                    db_manager.save_finger_set(student_full_name, s_age, s_gender, succeeded, image_refs=image_refs)
+                    st.session_state['results'] = {}
+
+                    # 3. Puanları bir kez hesapla ve sakla (onuncu parmak kaydedildi)
+                    db_manager.refresh_student_scores(student_full_name)
                     
                     st.balloons()
                     st.success("✅ Parmak resimleriniz başarıyla analiz edildi ve yetkili koçunuzun sistemine gönderildi.")
                     
-                    st.session_state['finger_folder'] = {}
+                    st.session_state['finger_folder'].clear()
+                    del finger_images
                     time.sleep(5)
                     logout()
 
@@ -449,22 +524,65 @@ def main():
         
         with col_t1:
             st.markdown("### 📋 Öğrenci Listesi")
-            students = db_manager.get_all_students()
+            search = st.text_input("🔎 Öğrenci Ara (isim başlangıcı)", key="student_search")
+            # Arama değişince ilk sayfaya dön
+            if st.session_state.get('student_search_last') != search:
+                st.session_state['student_search_last'] = search
+                st.session_state['student_page'] = 0
+            page = st.session_state.get('student_page', 0)
+
+            # Yalnızca görüntülenen sayfa veritabanından çekilir
+            students, total = cached_student_page(search, page, db_manager.data_version())
+            page_count = max(1, -(-total // db_manager.STUDENT_PAGE_SIZE))
             if not students:
-                st.info("Sistemde kayıtlı öğrenci yok.")
+                st.info("Aramaya uyan öğrenci yok." if search else "Sistemde kayıtlı öğrenci yok.")
                 selected_student = None
             else:
-                selected_student = st.radio("Raporlanacak Öğrenciyi Seç:", students)
+                selected_student = st.radio(
+                    "Raporlanacak Öğrenciyi Seç:", [s["name"] for s in students],
+                    format_func=lambda name: next(f"{s['name']} ({s['age']}, {s['gender']})" for s in students if s["name"] == name)
+                )
+
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("◀", disabled=page <= 0):
+                    st.session_state['student_page'] = page - 1
+                    st.rerun()
+            with col_page:
+                st.caption(f"Sayfa {page + 1}/{page_count} · {total} öğrenci")
+            with col_next:
+                if st.button("▶", disabled=page + 1 >= page_count):
+                    st.session_state['student_page'] = page + 1
+                    st.rerun()
+
+            # Sunucudaki öğrenci oturumlarının resim yükü (diskte) ve hafızada kalan önizlemeler
+            with st.expander("🖥️ Oturum Bellek Durumu"):
+                mem = session_store.get_stats()
+                st.caption(f"Aktif oturum: {mem['sessions']} · Resim: {mem['images']}")
+                st.caption(f"Diskte: {mem['disk_bytes'] / 1e6:.1f} MB · Hafızada: {mem['memory_bytes'] / 1e6:.1f} MB")
+                if 'pipeline_bytes' in mem:
+                    st.caption(f"Görüntü işleme önbelleği: {mem['pipelines']} resim, {mem['pipeline_bytes'] / 1e6:.1f} MB")
+                if 'peak_rss_kb' in mem:
+                    st.caption(f"Süreç en yüksek RSS: {mem['peak_rss_kb'] / 1024:.0f} MB")
 
         with col_t2:
             st.markdown("### 📝 Rapor İşlemleri")
             if selected_student:
                 st.info(f"Seçilen Öğrenci: **{selected_student}**")
+                parallel_mode = st.toggle("⚡ Bölümleri paralel yaz (13 ayrı istek, önbellekli)", value=False)
                 
-                if st.button("🧬 BALABAN GENETİK RAPORU OLUŞTUR", type="primary"):
+                col_gen, col_regen = st.columns([2, 1])
+                with col_gen:
+                    generate_clicked = st.button("🧬 BALABAN GENETİK RAPORU OLUŞTUR", type="primary")
+                with col_regen:
+                    # Arşivdeki raporu kullanmadan yeni sürüm yazdırır (eskisi geçmişte kalır)
+                    regenerate_clicked = st.button("♻️ Yeniden Oluştur")
+
+                if generate_clicked or regenerate_clicked:
                     
-                    # 1. Verileri Çek
-                    finger_data = db_manager.get_student_data(selected_student)
+                    # 1. Verileri Çek (Değişmediyse önbellekten)
+                    data_version = db_manager.data_version(selected_student)
+                    finger_data = cached_student_data(selected_student, data_version)
                     
                     if finger_data.empty:
                         st.error("Bu öğrenciye ait veri bulunamadı.")
@@ -478,18 +596,55 @@ def main():
                         
                         st.caption(f"Veritabanı Bilgisi -> Yaş: {real_age}, Cinsiyet: {real_gender}")
 
-                        # 2. Puanları Hesapla
-                        scores = db_manager.calculate_dmit_scores(finger_data)
+                        # Vision RC'si yerel iskelet sayımıyla tutmayan parmaklar öğretmene gösterilir
+                        if 'rc_check' in finger_data:
+                            mismatched = finger_data[finger_data['rc_check'] == "mismatch"]
+                            if not mismatched.empty:
+                                details = ", ".join(
+                                    f"{row.finger_code} (Vision {row.ridge_count}, yerel {int(row.rc_local)})"
+                                    for row in mismatched.itertuples()
+                                )
+                                st.warning(f"⚠️ Sırt sayısı (RC) uyuşmazlığı - elle kontrol önerilir: {details}")
+
+                        # 2. Puanları Al (Saklanan puanlar geçerliyse yeniden hesaplanmaz)
+                        scores = cached_student_scores(selected_student, data_version)
                         
                         # 3. GRAFİK PANELİNİ GÖSTER (YENİ)
-                        render_dmit_dashboard(scores)
-
-                        # 4. Raporu Oluştur (Yapay Zeka)
-                        with st.spinner("Yapay Zeka (Grok Reasoning) detaylı metin raporunu yazıyor..."):
-                            report_text = grok_service.generate_nobel_report(selected_student, real_age, real_gender, finger_data, scores)
-                            
-                            st.markdown("### 📝 Detaylı Yazılı Rapor")
+                        render_dmit_dashboard(scores.get("dashboard", {}),
+                                              figures=cached_dashboard_figures(selected_student, data_version))
+
+                        # 4. Raporu Oluştur (Yapay Zeka) - Girdiler değişmediyse arşivden
+                        st.markdown("### 📝 Detaylı Yazılı Rapor")
+                        report_mode = "sections" if parallel_mode else "full"
+                        archive_key = grok_service.report_archive_key(selected_student, real_age, finger_data, scores)
+                        archived = None if regenerate_clicked else db_manager.find_report(selected_student, mode=report_mode, **archive_key)
+
+                        if archived:
+                            st.caption(f"📦 Arşivden getirildi ({archived['created_at']}). Yeni sürüm için '♻️ Yeniden Oluştur'.")
+                            report_text = archived["content"]
                             st.markdown(report_text)
+                        elif parallel_mode:
+                            # Bölümler aynı anda yazılır, sırayla birleştirilir
+                            section_bar = st.progress(0, text="Bölümler paralel yazılıyor...")
+                            report_text = grok_service.generate_sectioned_report(
+                                selected_student, real_age, real_gender, finger_data, scores,
+                                use_cache=not regenerate_clicked,
+                                progress_callback=lambda done, total, title: section_bar.progress(done / total, text=f"✅ {title} ({done}/{total})")
+                            )
+                            section_bar.empty()
+                            st.markdown(report_text)
+                        else:
+                            # Metin geldikçe ekrana yazılır
+                            st.caption("Yapay Zeka (Grok Reasoning) detaylı metin raporunu yazıyor...")
+                            report_text = st.write_stream(
+                                grok_service.stream_nobel_report(selected_student, real_age, real_gender, finger_data, scores)
+                            )
+
+                        # Başarılı yeni rapor arşive eklenir (hatalı çıktılar saklanmaz)
+                        if not archived and not grok_service.is_failed_report(report_text):
+                            db_manager.save_report(selected_student, mode=report_mode, content=report_text, **archive_key)
+                        
+                        if report_text:
                             st.download_button(
                                 label="📥 Raporu İndir (MD/PDF)",
                                 data=report_text,
@@ -497,5 +652,51 @@ def main():
                                 mime="text/markdown"
                             )
 
+                # Tek Bölümü Yeniden Yaz (Paralel moddaki tam rapor yeni sürümü önbellekten alır)
+                with st.expander("🔁 Tek Bölümü Yeniden Yaz"):
+                    section_titles = dict(grok_service.REPORT_SECTIONS)
+                    section_key = st.selectbox("Bölüm", list(section_titles.keys()), format_func=lambda k: section_titles[k])
+                    if st.button("Bölümü Yeniden Yaz"):
+                        data_version = db_manager.data_version(selected_student)
+                        finger_data = cached_student_data(selected_student, data_version)
+                        if finger_data.empty:
+                            st.error("Bu öğrenciye ait veri bulunamadı.")
+                        else:
+                            real_age, real_gender = finger_data.iloc[0]['student_age'], finger_data.iloc[0]['student_gender']
+                            scores = cached_student_scores(selected_student, data_version)
+                            with st.spinner(f"{section_titles[section_key]} yeniden yazılıyor..."):
+                                section_text = grok_service.regenerate_report_section(
+                                    selected_student, real_age, real_gender,
+                                    finger_data, section_key,
+                                    scores=scores
+                                )
+                            st.markdown(section_text)
+
+                            # Diğer bölümler önbellekten gelir: güncel paralel rapor arşive yeni sürüm olarak eklenir
+                            if not grok_service.is_failed_report(section_text):
+                                report_text = grok_service.generate_sectioned_report(selected_student, real_age, real_gender, finger_data, scores)
+                                if not grok_service.is_failed_report(report_text):
+                                    db_manager.save_report(selected_student, mode="sections", content=report_text,
+                                                           **grok_service.report_archive_key(selected_student, real_age, finger_data, scores))
+
+                # Rapor Geçmişi (Arşivdeki önceki sürümler)
+                with st.expander("🗂️ Rapor Geçmişi"):
+                    history = cached_report_history(selected_student, db_manager.report_version(selected_student))
+                    if not history:
+                        st.caption("Bu öğrenci için arşivlenmiş rapor yok.")
+                    else:
+                        mode_names = {"full": "Tam rapor", "sections": "Paralel bölümler"}
+                        chosen = st.selectbox(
+                            "Sürüm", history,
+                            format_func=lambda r: f"#{r['id']} · {r['created_at']} · {mode_names.get(r['mode'], r['mode'])} · {r['model']} / {r['prompt_version']}"
+                        )
+                        st.download_button(
+                            label="📥 Bu Sürümü İndir",
+                            data=chosen["content"],
+                            file_name=f"{selected_student}_Rapor_{chosen['id']}.md",
+                            mime="text/markdown"
+                        )
+                        st.markdown(chosen["content"])
+
 if __name__ == "__main__":
     main()
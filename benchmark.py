@@ -0,0 +1,690 @@
+# -*- coding: utf-8 -*-
+"""
+DMIT Performans Ölçümleri (Benchmark)
+
+Kullanım:
+    python benchmark.py skeleton [--images a.jpg b.jpg ...] [--repeat 3]
+    python benchmark.py roi [--images ...]
+    python benchmark.py prompt
+    python benchmark.py stats [--students 10000]
+    python benchmark.py db [--sessions 8] [--students 25]
+    python benchmark.py classify [--fixtures klasör] [--per-class 6] [--save-fixtures klasör]
+    python benchmark.py ridges [--fixtures klasör] [--per-class 6]
+    python benchmark.py enhance [--images ...] [--per-class 3]   # tek çekirdek: OPENBLAS_NUM_THREADS=1
+    python benchmark.py batch [--images ...] [--count 20] [--workers 1 2 4]
+    python benchmark.py quality [--images ...] [--repeat 3]
+
+Resim verilmezse farklı çözünürlüklerde sentetik parmak izi görüntüleri üretilir.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import cv2
+import numpy as np
+
+import pandas as pd
+
+import image_utils
+import grok_service
+import dmit_engine
+import db_manager
+
+# -----------------------------------------------------------------------------
+# YARDIMCI FONKSİYONLAR
+# -----------------------------------------------------------------------------
+def synthetic_fingerprint(width, height, seed=0, background=200):
+    """
+    Eş merkezli, hafif gürültülü sırtlardan oluşan sentetik parmak izi (BGR) üretir.
+    Koyu arka plan (background < 100) Otsu sonrası büyük dolu bölge oluşturur
+    (telefon fotoğraflarındaki gölge/arka plan durumu).
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:height, :width].astype(np.float32)
+    cy, cx = height * 0.45, width * 0.5
+    r = np.hypot((yy - cy) * 0.8, xx - cx)
+    period = max(width, height) / 120.0
+    ridges = 127 + 100 * np.sin(r / period * 2 * np.pi + rng.random() * np.pi)
+
+    # Parmak ucunun dışı düz arka plan
+    mask = ((yy - cy) / (height * 0.42)) ** 2 + ((xx - cx) / (width * 0.3)) ** 2 <= 1
+    gray = np.where(mask, ridges, background) + rng.normal(0, 12, (height, width))
+    gray = np.clip(gray, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+def encode_jpeg(img):
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+def load_images(paths):
+    """Verilen dosyaları okur, yoksa sentetik set döner: [(isim, resim byte verisi)]"""
+    if paths:
+        images = []
+        for p in paths:
+            with open(p, "rb") as f:
+                images.append((p, f.read()))
+        return images
+    sizes = [(640, 480), (1280, 960), (2000, 1500), (4000, 3000)]
+    images = []
+    for i, (w, h) in enumerate(sizes):
+        images.append((f"açık zemin {w}x{h}", encode_jpeg(synthetic_fingerprint(w, h, seed=i))))
+        images.append((f"koyu zemin {w}x{h}", encode_jpeg(synthetic_fingerprint(w, h, seed=i, background=40))))
+    return images
+
+PATTERN_TYPES = ["A", "AT", "UL", "RL", "W", "S"]
+
+def pattern_orientation(kind, height, width, rng, hand="R"):
+    """
+    Desen tipine göre sırt yönelim alanı (sıfır-kutup modeli, Sherlock & Monro):
+    theta = ½ Σ arg(z - çekirdek) - ½ Σ arg(z - delta). Yay (A) tekil noktasız bir tümsektir.
+    Döngü deltanın karşı tarafına açılır; sağ elde sağa açılan UL'dir.
+
+    Dönüş:
+        (theta, cores, deltas) - tekil noktalar piksel koordinatında [(x, y), ...]
+    """
+    yy, xx = np.mgrid[:height, :width].astype(np.float64)
+    cx = width * (0.5 + rng.uniform(-0.05, 0.05))
+    cy = height * (0.45 + rng.uniform(-0.05, 0.05))
+    s = min(width, height)
+
+    if kind == "A":
+        bump = np.exp(-((xx - cx) / (0.35 * width)) ** 2 - ((yy - cy) / (0.6 * height)) ** 2)
+        return np.arctan(rng.uniform(0.5, 0.9) * 2 * (xx - cx) / (0.35 * width) * bump) % np.pi, [], []
+
+    if kind == "AT":
+        cores = [(cx, cy)]
+        deltas = [(cx + rng.uniform(-0.03, 0.03) * s, cy + rng.uniform(0.2, 0.28) * s)]
+    elif kind in ("UL", "RL"):
+        side = -1 if (kind == "UL") == (hand == "R") else 1
+        cores = [(cx, cy)]
+        deltas = [(cx + side * rng.uniform(0.28, 0.36) * s, cy + rng.uniform(0.25, 0.33) * s)]
+    elif kind == "W":
+        r = rng.uniform(0.03, 0.05) * s
+        cores = [(cx - r, cy), (cx + r, cy)]
+        deltas = [(cx - rng.uniform(0.3, 0.36) * s, cy + rng.uniform(0.28, 0.34) * s),
+                  (cx + rng.uniform(0.3, 0.36) * s, cy + rng.uniform(0.28, 0.34) * s)]
+    else:  # S
+        r = rng.uniform(0.1, 0.13) * s
+        cores = [(cx - r * 0.7, cy - r * 0.7), (cx + r * 0.7, cy + r * 0.7)]
+        deltas = [(cx - rng.uniform(0.3, 0.36) * s, cy + rng.uniform(0.3, 0.36) * s),
+                  (cx + rng.uniform(0.3, 0.36) * s, cy - rng.uniform(0.0, 0.05) * s)]
+
+    z = xx + 1j * yy
+    theta = np.zeros((height, width))
+    for c in cores:
+        theta += 0.5 * np.angle(z - complex(*c))
+    for d in deltas:
+        theta -= 0.5 * np.angle(z - complex(*d))
+    return theta % np.pi, cores, deltas
+
+def render_ridges(theta, period, seed=0, iterations=6, orientations=12):
+    """Gürültüden başlayıp yönelim alanına göre seçilen Gabor filtreleriyle sırt dokusu büyütür (-1..1)."""
+    rng = np.random.default_rng(seed)
+    img = rng.normal(0, 1, theta.shape).astype(np.float32)
+    index = np.round(theta / np.pi * orientations).astype(int) % orientations
+    kernels = [cv2.getGaborKernel((21, 21), period * 0.45, k * np.pi / orientations + np.pi / 2, period, 1.0, 0, cv2.CV_32F)
+               for k in range(orientations)]
+    for _ in range(iterations):
+        out = np.zeros_like(img)
+        for k, kernel in enumerate(kernels):
+            selected = index == k
+            if selected.any():
+                out[selected] = cv2.filter2D(img, -1, kernel)[selected]
+        img = np.tanh(out / (out.std() + 1e-6) * 2)
+    return img
+
+def synthetic_pattern_truth(kind, seed=0, hand="R", contrast=70, noise=10, height=440, width=360):
+    """
+    Bilinen desen tipinde sentetik parmak izi ve doğru cevapları.
+
+    Dönüş:
+        dict: image (JPEG byte), period (px), ridge_map (gürültüsüz sırt haritası, sırtlar 255),
+              cores, deltas (piksel koordinatı), rc (doğru noktalarla ridge_map üzerinde sayım)
+    """
+    rng = np.random.default_rng(seed)
+    theta, cores, deltas = pattern_orientation(kind, height, width, rng, hand)
+    period = rng.uniform(8, 11)
+    ridges = render_ridges(theta, period=period, seed=seed)
+    yy, xx = np.mgrid[:height, :width]
+    mask = ((yy - height * 0.5) / (height * 0.47)) ** 2 + ((xx - width * 0.5) / (width * 0.45)) ** 2 <= 1
+    gray = np.where(mask, 128 - contrast * ridges, 215).astype(np.float32)
+    gray = cv2.GaussianBlur(gray, (0, 0), 1.5) + rng.normal(0, noise, gray.shape)
+
+    ridge_map = np.where(ridges > 0, 255, 0).astype(np.uint8)
+    counted = image_utils.ridge_count_from_points(ridge_map, kind, cores, deltas, period)
+    return {"image": encode_jpeg(np.clip(gray, 0, 255).astype(np.uint8)), "period": period,
+            "ridge_map": ridge_map, "cores": cores, "deltas": deltas, "rc": counted["rc"]}
+
+def synthetic_pattern(kind, seed=0, hand="R", contrast=70, noise=10, height=440, width=360):
+    """Bilinen desen tipinde (A/AT/UL/RL/W/S) etiketli sentetik parmak izi (JPEG byte)."""
+    return synthetic_pattern_truth(kind, seed, hand, contrast, noise, height, width)["image"]
+
+def load_labeled_fixtures(directory):
+    """
+    Etiketli resim klasörü: <TİP>_<PARMAK>_<herhangi>.jpg (ör. UL_R2_001.jpg).
+    RC etiketi varsa üçüncü parça sayıdır (ör. UL_R2_14_001.jpg), bkz. fixture_rc.
+    Dönüş: [(dosya adı, tip, parmak kodu, resim byte verisi)]
+    """
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        parts = os.path.splitext(name)[0].split("_")
+        if len(parts) < 2 or parts[0] not in PATTERN_TYPES:
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            fixtures.append((name, parts[0], parts[1], f.read()))
+    return fixtures
+
+def fixture_rc(name):
+    """Dosya adındaki RC etiketi (<TİP>_<PARMAK>_<RC>_...), yoksa None."""
+    parts = os.path.splitext(name)[0].split("_")
+    return int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else None
+
+def timed(func, *args, repeat=3):
+    """En iyi süreyi (ms) ve son sonucu döner."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+# -----------------------------------------------------------------------------
+# 1. İSKELETLEŞTİRME MOTORLARI
+# -----------------------------------------------------------------------------
+def bench_skeleton(args):
+    backends = ["morph", "zhang_suen"]
+    if image_utils.OPENCV_THINNING_AVAILABLE:
+        backends.append("opencv")
+
+    print(f"{'Görüntü':<24}" + "".join(f"{b:>14}" for b in backends))
+    for name, data in load_images(args.images):
+        binary = image_utils.FingerprintPipeline(data).binary()
+        row = f"{name:<24}"
+        for backend in backends:
+            ms, _ = timed(image_utils.skeletonize, binary, backend, repeat=args.repeat)
+            row += f"{ms:>11.1f} ms"
+        print(row)
+
+# -----------------------------------------------------------------------------
+# 2. PARMAK UCU KIRPMA (ROI) ETKİSİ
+# -----------------------------------------------------------------------------
+def bench_roi(args):
+    """Tam kare ile ROI kırpılmış hattın süresini ve Vision'a giden JPEG boyutunu karşılaştırır."""
+    print(f"{'Görüntü':<24}{'tam kare':>12}{'ROI':>12}{'JPEG tam':>12}{'JPEG ROI':>12}  kutu / ölçek")
+    for name, data in load_images(args.images):
+        row = f"{name:<24}"
+        sizes = []
+        for enabled in (False, True):
+            image_utils.ROI_ENABLED = enabled
+            ms, pipeline = timed(lambda: _run_pipeline(data), repeat=args.repeat)
+            row += f"{ms:>9.1f} ms"
+            sizes.append(len(pipeline.processed_bytes()))
+        row += "".join(f"{s / 1024:>9.0f} KB" for s in sizes)
+        print(row + f"  {pipeline.roi_box} x{pipeline.roi_scale:.2f}")
+
+def _run_pipeline(data):
+    pipeline = image_utils.FingerprintPipeline(data)
+    pipeline.processed_bytes()
+    return pipeline
+
+# -----------------------------------------------------------------------------
+# 3. PROMPT BOYUTU
+# -----------------------------------------------------------------------------
+def bench_prompt(args):
+    """Sabit Vision sistem prompt'unun boyutu ve önbellek ayarı."""
+    size = grok_service.prompt_size_report(grok_service.VISION_SYSTEM_PROMPT)
+    print(f"Vision sistem prompt'u: {size['bytes']} bayt, {size['chars']} karakter, "
+          f"{size['tokens']} token ({size['token_source']})")
+    print(f"Prompt sürümü: {grok_service.VISION_PROMPT_VERSION} | "
+          f"Önek önbelleği: {'açık' if grok_service.PROMPT_CACHE_ENABLED else 'kapalı'}")
+
+# -----------------------------------------------------------------------------
+# 4. PUANLAMA (iterrows -> 10 slotlu NumPy)
+# -----------------------------------------------------------------------------
+def _legacy_engine(df):
+    """Eski DMITEngine (iterrows + sözlük) karşılaştırma için."""
+    weights = {"W": 10, "S": 9, "RL": 8, "UL": 7, "AT": 5, "A": 4, "Unknown": 4}
+    s = {}
+    for _, row in df.iterrows():
+        s[row['finger_code']] = weights.get(row['pattern_type'], 5) + row['ridge_count'] * 0.5
+
+    def pct(d):
+        total = sum(d.values()) or 1
+        return {k: round((v / total) * 100, 1) for k, v in d.items()}
+
+    g = lambda c: s.get(c, 0)
+    return {
+        "lobes": pct({i: g(f"L{i}") + g(f"R{i}") for i in range(1, 6)}),
+        "hemispheres": pct({"sol": sum(v for k, v in s.items() if k.startswith('R')),
+                            "sag": sum(v for k, v in s.items() if k.startswith('L'))}),
+        "multiple_intelligences": pct({"ic": g('L1') * 1.2, "sos": g('R1') * 1.2, "man": g('R2') * 1.5,
+                                       "soz": g('R4') + g('L4'), "gor": g('L2') + g('R5'), "muz": g('L4') * 1.3,
+                                       "bed": g('L3') + g('R3'), "dog": g('L5') + g('R5')}),
+        "learning_styles": pct({"v": g('L5') + g('R5') + g('L2'), "a": g('L4') + g('R4'),
+                                "k": g('L3') + g('R3') + g('R2')}),
+    }
+
+def random_students(count, seed=0):
+    rng = np.random.default_rng(seed)
+    patterns = np.array(list(dmit_engine.PATTERN_WEIGHTS))
+    return [pd.DataFrame({
+        "finger_code": dmit_engine.FINGER_CODES,
+        "pattern_type": rng.choice(patterns, 10),
+        "ridge_count": rng.integers(0, 30, 10),
+    }) for _ in range(count)]
+
+def bench_stats(args):
+    one = random_students(1)[0]
+    rows = [
+        ("DMITEngine (eski iterrows)", lambda: _legacy_engine(one)),
+        ("DMITEngine (10 slot)", lambda: dmit_engine.DMITEngine(one)),
+        ("advanced_stats (10 slot)", lambda: grok_service.calculate_advanced_stats(one)),
+        ("calculate_dmit_scores", lambda: db_manager.calculate_dmit_scores(one)),
+    ]
+    print("Tek öğrenci (ortalama, 200 tekrar):")
+    for name, func in rows:
+        start = time.perf_counter()
+        for _ in range(200):
+            func()
+        print(f"  {name:<34}{(time.perf_counter() - start) / 200 * 1e6:>10.1f} µs")
+
+    students = random_students(args.students)
+    print(f"\n{args.students} öğrenci:")
+    ms, _ = timed(lambda: [_legacy_engine(df) for df in students], repeat=1)
+    print(f"  {'eski iterrows (öğrenci başına)':<34}{ms:>10.1f} ms")
+    ms, _ = timed(lambda: [dmit_engine.DMITEngine(df) for df in students], repeat=1)
+    print(f"  {'10 slot (öğrenci başına)':<34}{ms:>10.1f} ms")
+
+    # Toplu API: uzun formattaki tüm kayıtlar -> (N x 10) -> tek geçiş
+    cohort = pd.concat([df.assign(student_name=f"ogrenci_{i}") for i, df in enumerate(students)],
+                       ignore_index=True)
+    ms, _ = timed(dmit_engine.DMITEngine.score_frame, cohort, repeat=3)
+    print(f"  {'score_frame (DataFrame -> N x 10)':<34}{ms:>10.1f} ms")
+    _, pattern_codes, ridge_counts = dmit_engine.DMITEngine.frame_to_batch(cohort)
+    ms, _ = timed(dmit_engine.DMITEngine.score_batch, pattern_codes, ridge_counts, repeat=3)
+    print(f"  {'score_batch (hazır N x 10 matris)':<34}{ms:>10.1f} ms")
+
+# -----------------------------------------------------------------------------
+# 5. VERİTABANI (eşzamanlı oturum yazma hızı)
+# -----------------------------------------------------------------------------
+def _finger_results(seed):
+    return {code: {"type": "W", "rc": f + seed, "confidence": "High", "dmit_insight": ""}
+            for f, code in enumerate(dmit_engine.FINGER_CODES)}
+
+def _legacy_save(path, student_name, results):
+    """Eski yazma yolu: parmak başına yeni bağlantı, varsayılan (rollback) günlük, DELETE + INSERT + commit."""
+    for finger_code, result in results.items():
+        conn = sqlite3.connect(path)
+        c = conn.cursor()
+        c.execute("DELETE FROM fingerprints WHERE student_name = ? AND finger_code = ?", (student_name, finger_code))
+        c.execute('''
+            INSERT INTO fingerprints (student_name, student_age, student_gender, finger_code, image_path, pattern_type, ridge_count, confidence, dmit_insight)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (student_name, 12, "E", finger_code, "memory", result["type"], result["rc"], "High", ""))
+        conn.commit()
+        conn.close()
+
+def _managed_save(path, student_name, results):
+    """Parmak başına add_fingerprint_record (thread bağlantısı, WAL, UPSERT)."""
+    for finger_code, result in results.items():
+        db_manager.add_fingerprint_record(student_name, 12, "E", finger_code, "memory",
+                                          result["type"], result["rc"], "High", "")
+
+def _bulk_save(path, student_name, results):
+    """Tüm set tek işlemde: save_finger_set."""
+    db_manager.save_finger_set(student_name, 12, "E", results)
+
+def _run_sessions(save, path, sessions, students):
+    """Her oturum (thread) kendi öğrencilerinin 10 parmağını kaydeder. Dönüş: (süre sn, hata sayısı)."""
+    errors = []
+    barrier = threading.Barrier(sessions)
+
+    def session(s):
+        barrier.wait()
+        for i in range(students):
+            try:
+                save(path, f"oturum{s}_ogrenci{i}", _finger_results(i))
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=session, args=(s,)) for s in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, len(errors)
+
+def bench_db(args):
+    writes = args.sessions * args.students * len(dmit_engine.FINGER_CODES)
+    print(f"{args.sessions} eşzamanlı oturum x {args.students} öğrenci x 10 parmak = {writes} kayıt")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save in (("eski (bağlantı/çağrı, rollback)", _legacy_save),
+                           ("parmak başına (thread bağl., WAL)", _managed_save),
+                           ("toplu set (save_finger_set)", _bulk_save)):
+            db_manager.DB_NAME = os.path.join(tmp, f"{save.__name__}.db")
+            db_manager.init_db()
+            if save is _legacy_save:
+                # Eski dosyalar rollback günlüğündeydi: karşılaştırma için geri çevrilir
+                db_manager.get_connection().execute("PRAGMA journal_mode = DELETE")
+                db_manager.close_connection()
+            seconds, errors = _run_sessions(save, db_manager.DB_NAME, args.sessions, args.students)
+            print(f"  {name:<34}{seconds * 1000:>9.0f} ms {writes / seconds:>9.0f} kayıt/sn  hata: {errors}")
+            db_manager.close_connection()
+
+# -----------------------------------------------------------------------------
+# 6. YEREL DESEN SINIFLANDIRICI (DOĞRULUK / GECİKME)
+# -----------------------------------------------------------------------------
+# Sentetik set: (kalite adı, sırt kontrastı, gürültü std)
+CLASSIFY_QUALITY_LEVELS = [("temiz", 70, 10), ("orta", 40, 20), ("zor", 25, 25)]
+
+def synthetic_fixtures(per_class):
+    fixtures = []
+    for level, contrast, noise in CLASSIFY_QUALITY_LEVELS:
+        for kind in PATTERN_TYPES:
+            for i in range(per_class):
+                hand = "RL"[i % 2]
+                data = synthetic_pattern(kind, seed=1000 + i, hand=hand, contrast=contrast, noise=noise)
+                fixtures.append((f"{kind}_{hand}2_{level}_{i:02d}.jpg", kind, f"{hand}2", data, level))
+    return fixtures
+
+def bench_classify(args):
+    """
+    image_utils.classify_pattern doğruluğu, güven eşiğinin üstünde kalan oran (API'ye tam prompt
+    ile gitmeyecek parmaklar) ve parmak başına gecikme. Süre decode + ROI + yönelim alanını kapsar.
+    """
+    if args.fixtures:
+        fixtures = [item + ("klasör",) for item in load_labeled_fixtures(args.fixtures)]
+    else:
+        print(f"Sentetik etiketli set üretiliyor ({args.per_class} x {len(PATTERN_TYPES)} tip x "
+              f"{len(CLASSIFY_QUALITY_LEVELS)} kalite)...")
+        fixtures = synthetic_fixtures(args.per_class)
+    if args.save_fixtures:
+        os.makedirs(args.save_fixtures, exist_ok=True)
+        for name, _, _, data, _ in fixtures:
+            with open(os.path.join(args.save_fixtures, name), "wb") as f:
+                f.write(data)
+    if not fixtures:
+        print("Etiketli resim bulunamadı (<TİP>_<PARMAK>_*.jpg).")
+        return
+
+    rows = []
+    for name, label, finger_code, data, level in fixtures:
+        result = image_utils.classify_pattern(data, finger_code)
+        rows.append({"level": level, "label": label, "predicted": result["type"],
+                     "confidence": result["confidence"], "ms": result["elapsed_ms"]})
+    df = pd.DataFrame(rows)
+    df["correct"] = df["label"] == df["predicted"]
+    df["confident"] = df["confidence"] >= args.threshold
+
+    print(f"\n{'Kalite':<10}{'adet':>6}{'doğruluk':>10}{'güvenli':>10}{'güvenli doğ.':>14}{'ort. ms':>10}{'p95 ms':>9}")
+    for level, group in list(df.groupby("level", sort=False)) + [("TOPLAM", df)]:
+        confident = group[group["confident"]]
+        precision = f"{confident['correct'].mean():.0%}" if len(confident) else "-"
+        print(f"{level:<10}{len(group):>6}{group['correct'].mean():>10.0%}{group['confident'].mean():>10.0%}"
+              f"{precision:>14}{group['ms'].mean():>10.1f}{group['ms'].quantile(0.95):>9.1f}")
+
+    print(f"\nKarışıklık matrisi (satır: etiket, sütun: tahmin, güven eşiği {args.threshold}):")
+    print(pd.crosstab(df["label"], df["predicted"]).reindex(index=PATTERN_TYPES, columns=PATTERN_TYPES + ["Unknown"], fill_value=0).to_string())
+
+# -----------------------------------------------------------------------------
+# 7. YEREL SIRT SAYIMI (DELTA -> ÇEKİRDEK)
+# -----------------------------------------------------------------------------
+def bench_ridges(args):
+    """
+    image_utils.ridge_count ile doğru RC arasındaki fark ve süre. Sentetik sette doğru RC,
+    gerçek tekil noktalarla gürültüsüz sırt haritasında sayılır; klasörde dosya adındaki RC kullanılır.
+    Süre decode + ROI + iskelet + yönelim alanı + sayımı kapsar.
+    """
+    cases = []
+    if args.fixtures:
+        for name, label, finger_code, data in load_labeled_fixtures(args.fixtures):
+            if fixture_rc(name) is not None:
+                cases.append(("klasör", label, finger_code, data, fixture_rc(name)))
+    else:
+        print(f"Sentetik set üretiliyor ({args.per_class} x {len(PATTERN_TYPES)} tip x "
+              f"{len(CLASSIFY_QUALITY_LEVELS)} kalite)...")
+        for level, contrast, noise in CLASSIFY_QUALITY_LEVELS:
+            for kind in PATTERN_TYPES:
+                for i in range(args.per_class):
+                    hand = "RL"[i % 2]
+                    truth = synthetic_pattern_truth(kind, seed=2000 + i, hand=hand, contrast=contrast, noise=noise)
+                    cases.append((level, kind, f"{hand}2", truth["image"], truth["rc"]))
+    if not cases:
+        print("RC etiketli resim bulunamadı (<TİP>_<PARMAK>_<RC>_*.jpg).")
+        return
+
+    rows = []
+    for level, label, finger_code, data, rc in cases:
+        local = image_utils.ridge_count(data, finger_code)
+        rows.append({"level": level, "type_ok": local["type"] == label, "reliable": local["reliable"],
+                     "error": abs(local["rc"] - rc), "ms": local["elapsed_ms"]})
+    df = pd.DataFrame(rows)
+    # RC karşılaştırması yalnızca desen doğru ve sayım güvenilir olduğunda anlamlı
+    usable = df["type_ok"] & df["reliable"]
+
+    print(f"\n{'Kalite':<10}{'adet':>6}{'kullanılır':>12}{'ort. hata':>11}{'±1':>7}{'±3':>7}{'ort. ms':>10}{'p95 ms':>9}")
+    for level, group in list(df.groupby("level", sort=False)) + [("TOPLAM", df)]:
+        errors = group.loc[usable[group.index], "error"]
+        stats = (f"{errors.mean():>11.2f}{(errors <= 1).mean():>7.0%}{(errors <= 3).mean():>7.0%}"
+                 if len(errors) else f"{'-':>11}{'-':>7}{'-':>7}")
+        print(f"{level:<10}{len(group):>6}{usable[group.index].mean():>12.0%}{stats}"
+              f"{group['ms'].mean():>10.1f}{group['ms'].quantile(0.95):>9.1f}")
+
+# -----------------------------------------------------------------------------
+# 8. İYİLEŞTİRME MODLARI (classic / gabor): SÜRE VE İSKELET KALİTESİ
+# -----------------------------------------------------------------------------
+def skeleton_quality(skeleton, truth_skeleton, mask, tolerance=2.0):
+    """
+    İskeletin doğru iskelete uyumu (parmak ucu maskesi içinde):
+        precision: iskelet piksellerinin doğru sırta `tolerance` px yakın olanları
+        recall: doğru sırt piksellerinin iskelete `tolerance` px yakın olanları
+        minutiae: 10.000 piksel başına uç + çatal noktası (sahte kopukluk/köprü göstergesi)
+    """
+    result = (skeleton > 0) & mask
+    truth = (truth_skeleton > 0) & mask
+    near_truth = cv2.distanceTransform(np.where(truth, 0, 255).astype(np.uint8), cv2.DIST_L2, 3) <= tolerance
+    near_result = cv2.distanceTransform(np.where(result, 0, 255).astype(np.uint8), cv2.DIST_L2, 3) <= tolerance
+    neighbours = cv2.filter2D((skeleton > 0).astype(np.uint8), -1, np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], np.uint8))
+    minutiae = result & ((neighbours == 1) | (neighbours >= 3))
+    return {
+        "precision": (result & near_truth).sum() / max(result.sum(), 1),
+        "recall": (truth & near_result).sum() / max(truth.sum(), 1),
+        "minutiae": minutiae.sum() / max(mask.sum(), 1) * 10000,
+    }
+
+def bench_enhance(args):
+    """
+    Süre: 10 parmaklık set (verilen/sentetik resimler döngüyle 10'a tamamlanır), normalize edilmiş
+    karede iyileştirme ve iyileştirme + iskelet. OpenCV tek thread'e alınır.
+    Kalite: Sentetik sette doğru sırt haritasının iskeletine uyum, uç/çatal yoğunluğu ve
+    doğru tekil noktalarla iskelet üzerinde sayılan RC'nin hatası.
+    """
+    cv2.setNumThreads(1)
+    modes = list(image_utils.ENHANCEMENT_MODES)
+    images = load_images(args.images)
+    grays = [image_utils.FingerprintPipeline(data).normalized() for _, data in images]
+    grays = (grays * 10)[:10]
+    for mode in modes:
+        image_utils.enhance(grays[0], mode)   # İlk çağrı (süzgeç bankası) ölçüme girmesin
+
+    print(f"10 parmak, normalize kare {grays[0].shape[1]}x{grays[0].shape[0]}...:")
+    print(f"{'Mod':<10}{'iyileştirme':>14}{'+ iskelet':>12}")
+    for mode in modes:
+        enhance_ms, binaries = timed(lambda: [image_utils.enhance(g, mode) for g in grays], repeat=args.repeat)
+        skeleton_ms, _ = timed(lambda: [image_utils.skeletonize(b) for b in binaries], repeat=1)
+        print(f"{mode:<10}{enhance_ms:>11.0f} ms{enhance_ms + skeleton_ms:>9.0f} ms")
+
+    print(f"\nİskelet kalitesi (sentetik, {args.per_class} x {len(PATTERN_TYPES)} tip x {len(CLASSIFY_QUALITY_LEVELS)} kalite):")
+    rows = []
+    for level, contrast, noise in CLASSIFY_QUALITY_LEVELS:
+        for kind in PATTERN_TYPES:
+            for i in range(args.per_class):
+                truth = synthetic_pattern_truth(kind, seed=3000 + i, hand="RL"[i % 2], contrast=contrast, noise=noise)
+                gray = cv2.imdecode(np.frombuffer(truth["image"], np.uint8), cv2.IMREAD_GRAYSCALE)
+                h, w = gray.shape
+                yy, xx = np.mgrid[:h, :w]
+                # Parmak ucu elipsinin iç kısmı (kenar geçişi hariç)
+                mask = ((yy - h * 0.5) / (h * 0.42)) ** 2 + ((xx - w * 0.5) / (w * 0.40)) ** 2 <= 1
+                truth_skeleton = image_utils.skeletonize(truth["ridge_map"])
+                for mode in modes:
+                    skeleton = image_utils.skeletonize(image_utils.enhance(gray, mode))
+                    row = {"level": level, "mode": mode, **skeleton_quality(skeleton, truth_skeleton, mask)}
+                    counted = image_utils.ridge_count_from_points(skeleton, kind, truth["cores"], truth["deltas"], truth["period"])
+                    row["rc_error"] = abs(counted["rc"] - truth["rc"])
+                    rows.append(row)
+    df = pd.DataFrame(rows)
+    summary = df.groupby(["level", "mode"], sort=False)[["precision", "recall", "minutiae", "rc_error"]].mean()
+    print(summary.to_string(float_format=lambda v: f"{v:.2f}"))
+
+# -----------------------------------------------------------------------------
+# 9. TOPLU ÖN İŞLEME (SÜREÇ HAVUZU): ÇEKİRDEK SAYISINA GÖRE VERİM
+# -----------------------------------------------------------------------------
+def bench_batch(args):
+    """
+    preprocess_batch verimi (resim/sn). Her turda pipeline önbelleği boşaltılır; havuz ilk
+    çağrıda açılır, açılış süresi ayrıca gösterilir (sunucu sürecinde bir kez ödenir).
+    """
+    if args.images:
+        images = [data for _, data in load_images(args.images)]
+        images = (images * args.count)[:args.count]
+    else:
+        # Farklı resimler: Seri yolda aynı içerik önbellekten gelmesin
+        images = [encode_jpeg(synthetic_fingerprint(800, 800, seed=i)) for i in range(args.count)]
+    codes = [f"{'RL'[i % 2]}{i % 5 + 1}" for i in range(len(images))]
+    workers_list = args.workers or sorted({1, 2, 4, os.cpu_count() or 1})
+
+    def run(workers):
+        image_utils._pipeline_cache.clear()
+        return image_utils.preprocess_batch(images, codes, workers=workers)
+
+    print(f"{len(images)} resim, çekirdek sayısı: {os.cpu_count()}")
+    print(f"{'Süreç':>6}{'süre':>12}{'resim/sn':>12}{'hızlanma':>10}{'havuz açılışı':>16}")
+    baseline = None
+    for workers in workers_list:
+        startup = ""
+        if workers > 1:
+            image_utils.shutdown_process_pool()
+            start = time.perf_counter()
+            run(workers)
+            startup = f"{(time.perf_counter() - start) * 1000:>13.0f} ms"
+        ms, _ = timed(run, workers, repeat=args.repeat)
+        baseline = baseline or ms
+        print(f"{workers:>6}{ms:>9.0f} ms{len(images) / ms * 1000:>12.1f}{baseline / ms:>9.2f}x{startup}")
+    image_utils.shutdown_process_pool()
+
+# -----------------------------------------------------------------------------
+# 10. KALİTE KAPISI: SÜRE VE KARAR DOĞRULUĞU
+# -----------------------------------------------------------------------------
+def quality_cases():
+    """Beklenen kararıyla sentetik kalite seti: [(isim, kabul edilmeli mi, gri görüntü)]"""
+    rng = np.random.default_rng(0)
+    gray = lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    finger = gray(synthetic_fingerprint(800, 800, seed=1)).astype(np.float32)
+    pattern = cv2.imdecode(np.frombuffer(synthetic_pattern("UL", seed=1), np.uint8), cv2.IMREAD_GRAYSCALE)
+    off_center = np.full((800, 800), 200, np.uint8)
+    off_center[:400, :400] = cv2.resize(pattern, (400, 400))
+    cases = [("açık zemin", True, finger.astype(np.uint8)),
+             ("koyu zemin", True, gray(synthetic_fingerprint(800, 800, seed=2, background=40)))]
+    for level, contrast, noise in CLASSIFY_QUALITY_LEVELS:
+        image = synthetic_pattern(PATTERN_TYPES[len(cases) % 6], seed=len(cases), contrast=contrast, noise=noise)
+        cases.append((f"desen ({level})", True, cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_GRAYSCALE)))
+    cases += [
+        ("boş kare", False, np.clip(128 + rng.normal(0, 5, (800, 800)), 0, 255).astype(np.uint8)),
+        ("gürültü", False, np.clip(128 + rng.normal(0, 30, (800, 800)), 0, 255).astype(np.uint8)),
+        ("aşırı pozlama", False, np.clip(finger + 120, 0, 255).astype(np.uint8)),
+        ("karanlık", False, np.clip(finger * 0.12, 0, 255).astype(np.uint8)),
+        ("bulanık", False, cv2.GaussianBlur(finger.astype(np.uint8), (0, 0), 6)),
+        ("düşük kontrast", False, np.clip((finger - 127) * 0.08 + 127, 0, 255).astype(np.uint8)),
+        ("ortalanmamış", False, off_center),
+        ("gradyan", False, np.tile(np.linspace(0, 255, 800), (800, 1)).astype(np.uint8)),
+    ]
+    return cases
+
+def bench_quality(args):
+    """Kalite kapısının çözünürlüğe göre süresi (decode hariç) ve sentetik sette kabul/ret doğruluğu."""
+    print(f"{'Görüntü':<24}{'decode':>10}{'eski (Laplacian)':>18}{'kalite kapısı':>15}  nedenler")
+    for name, data in load_images(args.images):
+        gray_image = image_utils.FingerprintPipeline(data).gray
+        decode_ms, _ = timed(lambda: cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE), repeat=args.repeat)
+        legacy_ms, _ = timed(lambda: cv2.Laplacian(gray_image, cv2.CV_64F).var(), repeat=args.repeat)
+        gate_ms, verdict = timed(image_utils.assess_quality, gray_image, repeat=args.repeat)
+        print(f"{name:<24}{decode_ms:>7.1f} ms{legacy_ms:>15.1f} ms{gate_ms:>12.1f} ms  {','.join(verdict['reasons']) or '-'}")
+
+    # Ölçütlerin kararı (reddetme modundaki gibi: herhangi bir neden = ret); uyarı modunda kabul sütunu ayrıca gösterilir
+    print(f"\n{'Durum':<20}{'beklenen':>10}{'ölçütler':>10}{'mod (' + image_utils.QUALITY_GATE_MODE + ')':>14}  nedenler")
+    correct = 0
+    cases = quality_cases()
+    for name, expected, gray_image in cases:
+        verdict = image_utils.quality_gate(encode_jpeg(gray_image))
+        passed = not verdict["reasons"]
+        correct += passed == expected
+        print(f"{name:<20}{'kabul' if expected else 'ret':>10}{'kabul' if passed else 'ret':>10}"
+              f"{'kabul' if verdict['accepted'] else 'ret':>14}  {','.join(verdict['reasons']) or '-'}")
+    print(f"Doğru karar: {correct}/{len(cases)} (yalnızca sentetik set; eşikler gerçek çekimlerle kalibre edilmedi)")
+
+# -----------------------------------------------------------------------------
+# ANA GİRİŞ
+# -----------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="DMIT performans ölçümleri")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("skeleton", help="İskeletleştirme motorlarını karşılaştırır")
+    p.add_argument("--images", nargs="*", default=[])
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_skeleton)
+
+    p = sub.add_parser("roi", help="Parmak ucu kırpmanın süre ve yük boyutuna etkisi")
+    p.add_argument("--images", nargs="*", default=[])
+    p.add_argument("--repeat", type=int, default=1)
+    p.set_defaults(func=bench_roi)
+
+    p = sub.add_parser("prompt", help="Sabit prompt boyut raporu")
+    p.set_defaults(func=bench_prompt)
+
+    p = sub.add_parser("stats", help="Puanlama kodu: tek öğrenci ve çoklu öğrenci")
+    p.add_argument("--students", type=int, default=10000)
+    p.set_defaults(func=bench_stats)
+
+    p = sub.add_parser("db", help="Eşzamanlı oturumlarda veritabanı yazma hızı")
+    p.add_argument("--sessions", type=int, default=8)
+    p.add_argument("--students", type=int, default=25)
+    p.set_defaults(func=bench_db)
+
+    p = sub.add_parser("classify", help="Yerel desen sınıflandırıcının doğruluğu ve gecikmesi")
+    p.add_argument("--fixtures", help="Etiketli resim klasörü (<TİP>_<PARMAK>_*.jpg)")
+    p.add_argument("--per-class", type=int, default=6, help="Sentetik set: kalite başına tip başına resim")
+    p.add_argument("--save-fixtures", help="Kullanılan seti bu klasöre yazar")
+    p.add_argument("--threshold", type=float, default=grok_service.LOCAL_CLASSIFIER_THRESHOLD)
+    p.set_defaults(func=bench_classify)
+
+    p = sub.add_parser("ridges", help="Yerel delta-çekirdek sırt sayımının doğruluğu ve süresi")
+    p.add_argument("--fixtures", help="RC etiketli resim klasörü (<TİP>_<PARMAK>_<RC>_*.jpg)")
+    p.add_argument("--per-class", type=int, default=6, help="Sentetik set: kalite başına tip başına resim")
+    p.set_defaults(func=bench_ridges)
+
+    p = sub.add_parser("enhance", help="İyileştirme modları: 10 parmak süresi ve iskelet kalitesi")
+    p.add_argument("--images", nargs="*", default=[])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--per-class", type=int, default=3, help="Sentetik kalite seti: kalite başına tip başına resim")
+    p.set_defaults(func=bench_enhance)
+
+    p = sub.add_parser("batch", help="Süreç havuzunda toplu ön işleme: çekirdek sayısına göre verim")
+    p.add_argument("--images", nargs="*", default=[])
+    p.add_argument("--count", type=int, default=20)
+    p.add_argument("--workers", nargs="*", type=int, default=[])
+    p.add_argument("--repeat", type=int, default=2)
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("quality", help="Kalite kapısı: süre ve kabul/ret doğruluğu")
+    p.add_argument("--images", nargs="*", default=[])
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_quality)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,100 @@
 import sqlite3
+import json
+import threading
+import time
 import pandas as pd
 import os
 
+import dmit_engine
+
 # Versiyon 2: Yeni şema için isim değişikliği (Eski hataları önler)
 DB_NAME = "dmit_system_v2.db"
 
+# -----------------------------------------------------------------------------
+# BAĞLANTI YÖNETİMİ (Thread başına tek bağlantı + WAL)
+# -----------------------------------------------------------------------------
+# WAL: Okuyucular yazarı, yazar okuyucuları beklemez; eşzamanlı oturumlarda kilitlenme azalır
+DB_JOURNAL_MODE = os.getenv("DMIT_DB_JOURNAL_MODE", "WAL")
+# WAL ile NORMAL güvenlidir (çökme sonrası tutarlı); her commit'te fsync yapılmaz
+DB_SYNCHRONOUS = os.getenv("DMIT_DB_SYNCHRONOUS", "NORMAL")
+# Sayfa önbelleği (KiB), negatif değer PRAGMA cache_size için KiB anlamına gelir
+DB_CACHE_SIZE_KB = int(os.getenv("DMIT_DB_CACHE_SIZE_KB", "16384"))
+# Kilitli veritabanında hata vermeden önce beklenecek süre (ms)
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DMIT_DB_BUSY_TIMEOUT_MS", "10000"))
+
+_local = threading.local()
+
+# -----------------------------------------------------------------------------
+# VERİ SÜRÜMÜ (Önbellek anahtarı: yazma olunca artar, okuma SQLite'a dokunmaz)
+# -----------------------------------------------------------------------------
+_versions_lock = threading.Lock()
+_global_version = 0
+_student_versions = {}
+
+def data_version(student_name=None):
+    """
+    Bu süreçteki yazma sayacı. student_name verilirse o öğrencinin, verilmezse tüm verinin sürümü.
+    Arayüz önbellekleri (st.cache_data) bu değeri anahtara katar; yazma olunca eski kayıtlar kullanılmaz.
+    """
+    with _versions_lock:
+        return _student_versions.get(student_name, 0) if student_name is not None else _global_version
+
+def _bump_data_version(student_name):
+    global _global_version
+    with _versions_lock:
+        _global_version += 1
+        _student_versions[student_name] = _student_versions.get(student_name, 0) + 1
+
+# Rapor arşivi ayrı sayaçta: Rapor kaydı öğrenci verisi, puan ve grafik önbelleklerini geçersiz kılmaz
+_report_versions = {}
+
+def report_version(student_name):
+    """Öğrencinin rapor arşivi sürümü (yalnızca save_report artırır; rapor geçmişi önbelleğinin anahtarı)."""
+    with _versions_lock:
+        return _report_versions.get(student_name, 0)
+
+def _bump_report_version(student_name):
+    with _versions_lock:
+        _report_versions[student_name] = _report_versions.get(student_name, 0) + 1
+
+def _open_connection(path):
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = {-DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def get_connection():
+    """
+    Çağıran thread'e ait bağlantıyı döner (yoksa açar ve ayarlarını yapar).
+    sqlite3 bağlantısı açıldığı thread'e bağlıdır; bağlantılar thread'ler arasında paylaşılmaz.
+    Bağlantı thread yaşadıkça kalır: Thread havuzu işçileri aynı bağlantıyı kullanır, Streamlit ise
+    her yeniden çalıştırmada (rerun) yeni bir ScriptRunner thread'i açtığı için her rerun kendi
+    bağlantısını açar (~0.3 ms) ve thread bitince bağlantı kapanır. Hiçbir kod bağlantının
+    rerun'lar arasında yaşamasına güvenmez: Her yazma "with conn:" içinde tamamlanır, oturum
+    durumu bağlantıda tutulmaz. WAL dosyada kalıcıdır, diğer PRAGMA'lar her açılışta uygulanır.
+    DB_NAME değişirse (ör. test/benchmark) yeni dosya için yeni bağlantı açılır.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_NAME:
+        if conn is not None:
+            conn.close()
+        conn = _open_connection(DB_NAME)
+        _local.conn, _local.path = conn, DB_NAME
+    return conn
+
+def close_connection():
+    """Çağıran thread'in bağlantısını kapatır (thread bitince zaten kapanır)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     c = conn.cursor()
     # Tabloyu oluştururken yaş ve cinsiyet alanlarını da ekliyoruz
     c.execute('''
@@ -24,69 +112,368 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # Hesaplanmış puanlar (öğrenci başına tek satır, formül sürümü ve girdi özetiyle)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS scores (
+            student_name TEXT PRIMARY KEY,
+            formula_version TEXT,
+            input_hash TEXT,
+            scores_json TEXT,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
     conn.commit()
-    conn.close()
+    migrate_db(conn)
 
-def add_fingerprint_record(student_name, student_age, student_gender, finger_code, image_path, pattern_type, ridge_count, confidence, dmit_insight):
+# -----------------------------------------------------------------------------
+# ŞEMA GÖÇLERİ (PRAGMA user_version ile sırayla, bir kez uygulanır)
+# -----------------------------------------------------------------------------
+def _migration_1_unique_finger(c):
+    """(student_name, finger_code) tekil indeksi: UPSERT, öğrenci araması ve listesi bu indeksi kullanır."""
+    # Eski dosyalarda aynı parmağın birden fazla kaydı olabilir: en son kayıt (en büyük id) tutulur
+    c.execute('''
+        DELETE FROM fingerprints WHERE id NOT IN (
+            SELECT MAX(id) FROM fingerprints GROUP BY student_name, finger_code
+        )
+    ''')
+    c.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_fingerprints_student_finger
+        ON fingerprints (student_name, finger_code)
+    ''')
+
+def _migration_2_students(c):
     """
-    Öğrenci verilerini yaş ve cinsiyet dahil kaydeder.
+    Normalleştirilmiş students tablosu: tamsayı id, yaş/cinsiyet tek yerde, aramada kullanılan search_key.
+    fingerprints.student_id yabancı anahtarı eklenir ve eski kayıtlardan doldurulur.
+    (fingerprints.student_age/student_gender eski dosyalarda kalır ama artık yazılmaz/okunmaz.)
     """
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    # Eski kaydı temizle (Aynı parmak için güncelleme mantığı)
-    c.execute("DELETE FROM fingerprints WHERE student_name = ? AND finger_code = ?", (student_name, finger_code))
-    
-    # Yeni verileri ekle
     c.execute('''
-        INSERT INTO fingerprints (student_name, student_age, student_gender, finger_code, image_path, pattern_type, ridge_count, confidence, dmit_insight)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (student_name, student_age, student_gender, finger_code, image_path, pattern_type, ridge_count, confidence, dmit_insight))
-    
-    conn.commit()
-    conn.close()
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            search_key TEXT NOT NULL,
+            age INTEGER,
+            gender TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_students_search_key ON students (search_key, id)")
+
+    # Her öğrencinin en son kaydındaki yaş/cinsiyet taşınır
+    c.execute('''
+        SELECT student_name, student_age, student_gender FROM fingerprints
+        WHERE id IN (SELECT MAX(id) FROM fingerprints GROUP BY student_name)
+    ''')
+    c.executemany(
+        "INSERT OR IGNORE INTO students (name, search_key, age, gender) VALUES (?, ?, ?, ?)",
+        [(name, student_search_key(name), age, gender) for name, age, gender in c.fetchall()],
+    )
+
+    c.execute("ALTER TABLE fingerprints ADD COLUMN student_id INTEGER REFERENCES students(id)")
+    c.execute("UPDATE fingerprints SET student_id = (SELECT id FROM students WHERE name = fingerprints.student_name)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_student_id ON fingerprints (student_id)")
+
+def _migration_3_processed_path(c):
+    """İçerik adresli resim deposu: image_path orijinali, processed_path işlenmiş iskeleti gösterir."""
+    c.execute("ALTER TABLE fingerprints ADD COLUMN processed_path TEXT")
+
+def _migration_4_reports(c):
+    """Rapor arşivi: Öğrenci + girdi özeti + model + prompt sürümü + mod ile aranır, eski sürümler saklanır."""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_name TEXT NOT NULL,
+            input_hash TEXT NOT NULL,
+            model TEXT,
+            prompt_version TEXT,
+            mode TEXT,
+            content TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reports_lookup
+        ON reports (student_name, input_hash, model, prompt_version, mode, id)
+    ''')
+
+def _migration_5_rc_check(c):
+    """Yerel sırt sayımı kontrolü: rc_local (iskelet sayımı) ve rc_check ("ok" / "mismatch", yoksa NULL)."""
+    c.execute("ALTER TABLE fingerprints ADD COLUMN rc_local INTEGER")
+    c.execute("ALTER TABLE fingerprints ADD COLUMN rc_check TEXT")
+
+MIGRATIONS = [
+    _migration_1_unique_finger,
+    _migration_2_students,
+    _migration_3_processed_path,
+    _migration_4_reports,
+    _migration_5_rc_check,
+]
+
+def migrate_db(conn=None):
+    """Uygulanmamış göçleri tek işlemde çalıştırır; mevcut dmit_system_v2.db dosyaları yerinde güncellenir."""
+    conn = conn or get_connection()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return version
+    with conn:
+        # init_db her rerun'da çağrılır: Birden fazla oturum aynı anda eski sürümü görebilir.
+        # Yazma kilidi alındıktan sonra sürüm yeniden okunur; başka bağlantı uyguladıysa atlanır.
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            return version
+        c = conn.cursor()
+        for migration in MIGRATIONS[version:]:
+            migration(c)
+        c.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+    return len(MIGRATIONS)
+
+# -----------------------------------------------------------------------------
+# ÖĞRENCİLER
+# -----------------------------------------------------------------------------
+STUDENT_PAGE_SIZE = int(os.getenv("DMIT_STUDENT_PAGE_SIZE", "25"))
+
+def student_search_key(name):
+    """Büyük/küçük harf duyarsız önek araması için anahtar (Türkçe I/İ/ı/i aynı harf sayılır)."""
+    return name.strip().replace("İ", "i").replace("I", "i").replace("ı", "i").casefold()
+
+def _ensure_student(conn, student_name, student_age, student_gender):
+    """Öğrenciyi ekler ya da yaş/cinsiyetini günceller; öğrenci id'sini döner (açık işlem içinde çağrılır)."""
+    conn.execute('''
+        INSERT INTO students (name, search_key, age, gender) VALUES (?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET age = excluded.age, gender = excluded.gender
+    ''', (student_name, student_search_key(student_name), student_age, student_gender))
+    return conn.execute("SELECT id FROM students WHERE name = ?", (student_name,)).fetchone()[0]
+
+def list_students(prefix="", page=0, page_size=None):
+    """
+    Öğretmen listesi için sayfalı, önek aramalı öğrenci listesi (search_key indeksi üzerinden).
+
+    Dönüş:
+        (rows, total): rows -> [{"id", "name", "age", "gender"}] (yalnızca istenen sayfa),
+                       total -> aramaya uyan toplam öğrenci sayısı
+    """
+    page_size = page_size or STUDENT_PAGE_SIZE
+    key = student_search_key(prefix)
+    # Önek araması aralık sorgusuna çevrilir: key <= search_key < key + U+10FFFF
+    where, params = ("WHERE search_key >= ? AND search_key < ?", (key, key + "\U0010ffff")) if key else ("", ())
+
+    conn = get_connection()
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM students {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT id, name, age, gender FROM students {where} ORDER BY search_key, id LIMIT ? OFFSET ?",
+            params + (page_size, max(0, page) * page_size),
+        ).fetchall()
+    except sqlite3.Error:
+        return [], 0
+    return [{"id": r[0], "name": r[1], "age": r[2], "gender": r[3]} for r in rows], total
+
+UPSERT_FINGERPRINT_SQL = '''
+    INSERT INTO fingerprints (student_id, student_name, finger_code, image_path, processed_path, pattern_type, ridge_count, confidence, dmit_insight, rc_local, rc_check)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (student_name, finger_code) DO UPDATE SET
+        student_id = excluded.student_id,
+        image_path = excluded.image_path,
+        processed_path = excluded.processed_path,
+        pattern_type = excluded.pattern_type,
+        ridge_count = excluded.ridge_count,
+        confidence = excluded.confidence,
+        dmit_insight = excluded.dmit_insight,
+        rc_local = excluded.rc_local,
+        rc_check = excluded.rc_check,
+        created_at = CURRENT_TIMESTAMP
+'''
+
+def add_fingerprint_record(student_name, student_age, student_gender, finger_code, image_path, pattern_type, ridge_count, confidence, dmit_insight, processed_path=None,
+                           rc_local=None, rc_check=None):
+    """
+    Öğrenci verilerini yaş ve cinsiyet dahil kaydeder.
+    """
+    conn = get_connection()
+    # Bağlantı kalıcı olduğundan işlem "with" ile yürütülür: hata olursa geri alınır, açık kalmaz
+    with conn:
+        student_id = _ensure_student(conn, student_name, student_age, student_gender)
+        # Aynı parmak varsa tek ifadede güncellenir (tekil indeks üzerinden, tablo taraması yok)
+        conn.execute(UPSERT_FINGERPRINT_SQL, (student_id, student_name, finger_code, image_path, processed_path,
+                                              pattern_type, ridge_count, confidence, dmit_insight,
+                                              rc_local, rc_check))
+    _bump_data_version(student_name)
+
+def save_finger_set(student_name, student_age, student_gender, results, image_refs=None, image_path="memory"):
+    """
+    Bir öğrencinin parmak setini (ör. 10 parmak) tek işlemde, executemany ile kaydeder.
+    Herhangi bir satır hata verirse hiçbiri yazılmaz (yarım kalmış set bırakmaz); tek commit/fsync.
+
+    Args:
+        results: {finger_code: analiz sonucu} - grok_service.analyze_fingers_concurrently çıktısı
+                 (type, rc, confidence, dmit_insight; varsa rc_local, rc_check anahtarları)
+        image_refs: {finger_code: {"image_path", "processed_path"}} - image_store.store_finger_set çıktısı
+                    (verilmeyen parmaklar için image_path kullanılır)
+
+    Dönüş:
+        dict: rows (yazılan satır), elapsed_ms (toplam), lock_wait_ms (yazma kilidini bekleme süresi)
+    """
+    start = time.perf_counter()
+    conn = get_connection()
+    with conn:
+        # Yazma kilidi baştan alınır: başka oturum yazıyorsa burada (busy_timeout kadar) beklenir
+        conn.execute("BEGIN IMMEDIATE")
+        locked = time.perf_counter()
+        student_id = _ensure_student(conn, student_name, student_age, student_gender)
+        image_refs = image_refs or {}
+        rows = [
+            (student_id, student_name, finger_code,
+             image_refs.get(finger_code, {}).get("image_path", image_path),
+             image_refs.get(finger_code, {}).get("processed_path"),
+             result.get("type", "Unknown"), result.get("rc", 0),
+             result.get("confidence", "Low"), result.get("dmit_insight", ""),
+             result.get("rc_local"), result.get("rc_check"))
+            for finger_code, result in results.items()
+        ]
+        conn.executemany(UPSERT_FINGERPRINT_SQL, rows)
+    end = time.perf_counter()
+    _bump_data_version(student_name)
+
+    return {
+        "rows": len(rows),
+        "elapsed_ms": (end - start) * 1000,
+        "lock_wait_ms": (locked - start) * 1000,
+    }
 
 def get_all_students():
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     c = conn.cursor()
     # Hata önlemek için tablo yoksa boş liste dön
     try:
-        c.execute("SELECT DISTINCT student_name FROM fingerprints")
+        c.execute("SELECT name FROM students ORDER BY search_key, id")
         students = [row[0] for row in c.fetchall()]
     except:
         students = []
-    conn.close()
     return students
 
 def get_student_data(student_name):
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     try:
-        df = pd.read_sql_query("SELECT * FROM fingerprints WHERE student_name = ?", conn, params=(student_name,))
+        # Yaş ve cinsiyet students tablosundan gelir (tek kaynak); sütun adları eskisiyle aynıdır
+        df = pd.read_sql_query('''
+            SELECT f.id, f.student_id, f.student_name, s.age AS student_age, s.gender AS student_gender,
+                   f.finger_code, f.image_path, f.processed_path, f.pattern_type, f.ridge_count, f.confidence,
+                   f.dmit_insight, f.rc_local, f.rc_check, f.created_at
+            FROM fingerprints f JOIN students s ON s.id = f.student_id
+            WHERE f.student_name = ? ORDER BY f.id
+        ''', conn, params=(student_name,))
     except:
         df = pd.DataFrame()
-    conn.close()
     return df
 
+def get_student_image_refs(student_name):
+    """Depoda resmi olan parmaklar: {finger_code: {"image_path", "processed_path"}} (eski "memory" kayıtları hariç)."""
+    conn = get_connection()
+    try:
+        rows = conn.execute('''
+            SELECT finger_code, image_path, processed_path FROM fingerprints
+            WHERE student_name = ? AND image_path IS NOT NULL AND image_path != 'memory'
+        ''', (student_name,)).fetchall()
+    except sqlite3.Error:
+        rows = []
+    return {code: {"image_path": image_path, "processed_path": processed_path} for code, image_path, processed_path in rows}
+
 def calculate_dmit_scores(df):
-    if df.empty:
+    # Formüller dmit_engine'deki tek, sürümlü puanlama servisinde
+    return dmit_engine.dashboard_scores(df)
+
+def save_student_scores(student_name, scores):
+    """compute_scores çıktısını scores tablosuna yazar (öğrenci başına tek satır)."""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO scores (student_name, formula_version, input_hash, scores_json, computed_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (student_name, scores["version"], scores["input_hash"], json.dumps(scores, ensure_ascii=False)))
+
+def load_student_scores(student_name):
+    """Saklanan puanları döner; kayıt yoksa None."""
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("SELECT scores_json FROM scores WHERE student_name = ?", (student_name,))
+        row = c.fetchone()
+    except sqlite3.Error:
+        row = None
+    return json.loads(row[0]) if row else None
+
+def refresh_student_scores(student_name):
+    """
+    Öğrencinin 10 parmağı da kayıtlıysa puanları hesaplayıp saklar (onuncu parmak kaydından sonra çağrılır).
+    Eksik parmak varsa hiçbir şey yazılmaz ve None döner.
+    """
+    finger_data = get_student_data(student_name)
+    if finger_data.empty or finger_data['finger_code'].nunique() < len(dmit_engine.FINGER_CODES):
+        return None
+    scores = dmit_engine.compute_scores(finger_data)
+    save_student_scores(student_name, scores)
+    return scores
+
+# -----------------------------------------------------------------------------
+# RAPOR ARŞİVİ
+# -----------------------------------------------------------------------------
+def save_report(student_name, input_hash, model, prompt_version, mode, content):
+    """Oluşturulan raporu arşive ekler (eski sürümler silinmez). Dönüş: rapor id."""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute('''
+            INSERT INTO reports (student_name, input_hash, model, prompt_version, mode, content)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (student_name, input_hash, model, prompt_version, mode, content))
+    _bump_report_version(student_name)
+    return cursor.lastrowid
+
+def _report_row(row):
+    keys = ("id", "student_name", "input_hash", "model", "prompt_version", "mode", "content", "created_at")
+    return dict(zip(keys, row))
+
+def find_report(student_name, input_hash, model, prompt_version, mode):
+    """Aynı girdi/model/prompt sürümü için arşivdeki en yeni rapor; yoksa None."""
+    conn = get_connection()
+    try:
+        row = conn.execute('''
+            SELECT id, student_name, input_hash, model, prompt_version, mode, content, created_at FROM reports
+            WHERE student_name = ? AND input_hash = ? AND model = ? AND prompt_version = ? AND mode = ?
+            ORDER BY id DESC LIMIT 1
+        ''', (student_name, input_hash, model, prompt_version, mode)).fetchone()
+    except sqlite3.Error:
+        row = None
+    return _report_row(row) if row else None
+
+def list_reports(student_name, limit=20):
+    """Öğrencinin rapor geçmişi (yeniden eskiye), içerik dahil."""
+    conn = get_connection()
+    try:
+        rows = conn.execute('''
+            SELECT id, student_name, input_hash, model, prompt_version, mode, content, created_at FROM reports
+            WHERE student_name = ? ORDER BY id DESC LIMIT ?
+        ''', (student_name, limit)).fetchall()
+    except sqlite3.Error:
+        rows = []
+    return [_report_row(row) for row in rows]
+
+def get_student_scores(student_name, finger_data=None):
+    """
+    Öğretmen paneli ve raporlar için puanlar.
+    Saklanan puanlar, formül sürümü ve girdi özeti hâlâ geçerliyse doğrudan döner;
+    aksi halde yeniden hesaplanıp saklanır.
+    """
+    if finger_data is None:
+        finger_data = get_student_data(student_name)
+    if finger_data.empty:
         return {}
 
-    total_rc = df['ridge_count'].sum()
-    # Pattern analizleri (Pattern Type içinde geçen harfe göre sayar)
-    whorl_count = len(df[df['pattern_type'].str.contains('W', na=False)])
-    loop_count = len(df[df['pattern_type'].str.contains('L', na=False)]) # UL, RL, L hepsi dahil
-    
-    scores = {
-        "tfrc": int(total_rc),
-        "whorl_count": whorl_count,
-        "loop_count": loop_count,
-        "learning_potential": "Yüksek" if total_rc > 100 else "Normal",
-        "lobes": {
-            "prefrontal": 20 + (whorl_count * 2),
-            "frontal": 20,
-            "parietal": 20,
-            "temporal": 20 + (loop_count * 2),
-            "occipital": 20
-        }
-    }
+    stored = load_student_scores(student_name)
+    if (stored and stored.get("version") == dmit_engine.SCORING_VERSION
+            and stored.get("input_hash") == dmit_engine.input_signature(finger_data)):
+        return stored
+
+    scores = dmit_engine.compute_scores(finger_data)
+    save_student_scores(student_name, scores)
     return scores
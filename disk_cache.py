@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+İçerik adresli disk önbelleği (JSON).
+
+Anahtarlar SHA-256 ile özetlenir ve dosyalar ilk iki karaktere göre
+alt klasörlere (shard) yazılır. Boyut sınırı aşılınca en uzun süredir
+kullanılmayan kayıtlar silinir (LRU).
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+def make_key(*parts):
+    """Parçalardan kararlı bir SHA-256 anahtarı üretir."""
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+class DiskCache:
+    def __init__(self, directory, max_entries=5000, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._index = None   # {key: [size, last_access]}
+        self._total_bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """Klasördeki mevcut kayıtları ilk kullanımda bir kez tarar."""
+        if self._index is not None:
+            return
+        self._index = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".json"):
+                    continue
+                st = os.stat(os.path.join(shard_dir, name))
+                self._index[name[:-5]] = [st.st_size, st.st_mtime]
+                self._total_bytes += st.st_size
+
+    def get(self, key):
+        """Kayıt varsa değerini, yoksa None döner."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self.stats["hits"] += 1
+            if self._index is not None and key in self._index:
+                self._index[key][1] = now
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Yarım yazılmış dosya okunmasın diye geçici dosya + atomik yer değiştirme
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._load_index()
+            old = self._index.get(key)
+            if old:
+                self._total_bytes -= old[0]
+            self._index[key] = [len(data), time.time()]
+            self._total_bytes += len(data)
+            self.stats["writes"] += 1
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._load_index()
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self._index.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[0]
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if len(self._index) <= self.max_entries and self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if len(self._index) <= self.max_entries and self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            self.stats["evictions"] += 1
+
+    def get_stats(self):
+        """Sayaçlar + kayıt sayısı ve toplam boyut."""
+        with self._lock:
+            self._load_index()
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats,
+                        entries=len(self._index),
+                        bytes=self._total_bytes,
+                        hit_rate=(self.stats["hits"] / lookups) if lookups else 0.0)
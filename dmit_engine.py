@@ -5,87 +5,318 @@ Created on Thu Feb  5 22:38:22 2026
 @author: YYYNÇİGGGİİÜÜÜÜĞĞĞ
 """
 
+import json
+import hashlib
+
+import numpy as np
 import pandas as pd
 
+# -----------------------------------------------------------------------------
+# SABİT 10 SLOTLU TEMSİL (L1..R5)
+# -----------------------------------------------------------------------------
+FINGER_CODES = ["L1", "L2", "L3", "L4", "L5", "R1", "R2", "R3", "R4", "R5"]
+FINGER_INDEX = {code: i for i, code in enumerate(FINGER_CODES)}
+
+# Ağırlıklar: Whorl (W)=10, S=9, RL=8, UL=7, AT=5, A=4
+PATTERN_WEIGHTS = {"W": 10, "S": 9, "RL": 8, "UL": 7, "AT": 5, "A": 4, "Unknown": 4}
+DEFAULT_PATTERN_WEIGHT = 5
+
+def slot_matrix(rows):
+    """{satır: {parmak: katsayı}} -> (satır sayısı x 10) katsayı matrisi."""
+    matrix = np.zeros((len(rows), len(FINGER_CODES)))
+    for r, coefficients in enumerate(rows.values()):
+        for code, value in coefficients.items():
+            matrix[r, FINGER_INDEX[code]] = value
+    return list(rows.keys()), matrix
+
+# L1/R1: Prefrontal, L2/R2: Frontal, L3/R3: Parietal, L4/R4: Temporal, L5/R5: Occipital
+LOBE_KEYS, LOBE_MATRIX = slot_matrix({
+    "Prefrontal (Kişilik)": {"L1": 1, "R1": 1},
+    "Frontal (Mantık)": {"L2": 1, "R2": 1},
+    "Parietal (Kinestetik)": {"L3": 1, "R3": 1},
+    "Temporal (İşitsel)": {"L4": 1, "R4": 1},
+    "Occipital (Görsel)": {"L5": 1, "R5": 1},
+})
+
+# Sağ el sol beyni, sol el sağ beyni yönetir
+HEMISPHERE_KEYS, HEMISPHERE_MATRIX = slot_matrix({
+    "Sol Beyin (Analitik)": {c: 1 for c in FINGER_CODES if c.startswith("R")},
+    "Sağ Beyin (Yaratıcı)": {c: 1 for c in FINGER_CODES if c.startswith("L")},
+})
+
+# Çoklu Zeka (Simülasyon Ağırlıkları)
+MI_KEYS, MI_MATRIX = slot_matrix({
+    "İçsel (Intrapersonal)": {"L1": 1.2},
+    "Sosyal (Interpersonal)": {"R1": 1.2},
+    "Mantıksal": {"R2": 1.5},
+    "Sözel/Dilsel": {"R4": 1, "L4": 1},
+    "Görsel/Uzamsal": {"L2": 1, "R5": 1},
+    "Müziksel": {"L4": 1.3},
+    "Bedensel/Kinestetik": {"L3": 1, "R3": 1},
+    "Doğasal": {"L5": 1, "R5": 1},
+})
+
+# VAK Modeli
+LEARNING_STYLE_KEYS, LEARNING_STYLE_MATRIX = slot_matrix({
+    "Görsel (Visual)": {"L5": 1, "R5": 1, "L2": 1},
+    "İşitsel (Auditory)": {"L4": 1, "R4": 1},
+    "Kinestetik (Dokunsal)": {"L3": 1, "R3": 1, "R2": 1},
+})
+
+def finger_arrays(df):
+    """
+    Öğrenci DataFrame'ini sabit 10 slotlu dizilere çevirir (L1..R5 sırası).
+    Aynı parmak birden fazla kez varsa son kayıt geçerlidir.
+
+    Dönüş:
+        dict: weight, rc (float), present (bool), pattern (desen kodu, eksikse "") - her biri (10,) dizi
+    """
+    arrays = {
+        "weight": np.zeros(10),
+        "rc": np.zeros(10),
+        "present": np.zeros(10, dtype=bool),
+        "pattern": np.full(10, "", dtype=object),
+    }
+    if df.empty:
+        return arrays
+
+    # En fazla 10 satır: Sütunlar bir kez NumPy'a alınır, slotlara yerleştirilir
+    codes = df['finger_code'].to_numpy()
+    patterns = df['pattern_type'].to_numpy()
+    ridge_counts = df['ridge_count'].to_numpy(dtype=float)
+
+    for code, pattern, rc in zip(codes, patterns, ridge_counts):
+        i = FINGER_INDEX.get(code)
+        if i is None:
+            continue
+        arrays["present"][i] = True
+        arrays["rc"][i] = rc
+        arrays["weight"][i] = PATTERN_WEIGHTS.get(pattern, DEFAULT_PATTERN_WEIGHT)
+        arrays["pattern"][i] = pattern if isinstance(pattern, str) else ""
+    return arrays
+
+def raw_score_array(weight, rc, present):
+    """Formül: Desen Ağırlığı + (Sırt Sayısı * 0.5). Eksik parmaklar 0. Şekil (..., 10)."""
+    return np.where(present, weight + rc * 0.5, 0.0)
+
+def percentages(values):
+    """Son eksen boyunca yüzdeye çevirir (toplam 0 ise 1 kabul edilir)."""
+    total = values.sum(axis=-1, keepdims=True)
+    return values / np.where(total == 0, 1, total) * 100
+
+def _rounded_dict(keys, values):
+    return {k: round(float(v), 1) for k, v in zip(keys, values)}
+
+# Sonuç grupları: (sonuç anahtarı, satır isimleri, katsayı matrisi)
+SCORE_GROUPS = [
+    ("lobes", LOBE_KEYS, LOBE_MATRIX),
+    ("hemispheres", HEMISPHERE_KEYS, HEMISPHERE_MATRIX),
+    ("multiple_intelligences", MI_KEYS, MI_MATRIX),
+    ("learning_styles", LEARNING_STYLE_KEYS, LEARNING_STYLE_MATRIX),
+]
+
+def pattern_weight_array(pattern_codes):
+    """
+    Desen kodu matrisini (N x 10) ağırlık matrisine çevirir.
+    Sözlük araması her farklı kod için bir kez yapılır (np.unique), hücre başına değil.
+    Boş hücreler (None/NaN/"") eksik parmak sayılır.
+
+    Dönüş:
+        (weight, present): float ve bool dizileri, girişle aynı şekilde
+    """
+    codes = np.asarray(pattern_codes, dtype=object)
+    present = ~pd.isna(codes) & (codes != "")
+    filled = np.where(present, codes, "").astype(str)
+    unique, inverse = np.unique(filled, return_inverse=True)
+    lookup = np.array([PATTERN_WEIGHTS.get(code, DEFAULT_PATTERN_WEIGHT) for code in unique], dtype=float)
+    weight = np.where(present, lookup[inverse.reshape(filled.shape)], 0.0)
+    return weight, present
+
+def score_raw_matrix(raw):
+    """Ham puan matrisinden (N x 10) tüm grupların yüzde matrislerini tek geçişte hesaplar."""
+    return {name: percentages(raw @ matrix.T) for name, _, matrix in SCORE_GROUPS}
+
 class DMITEngine:
     def __init__(self, df_fingerprints):
         self.data = df_fingerprints
+        self.arrays = finger_arrays(df_fingerprints)
         self.results = self.run_full_analysis()
 
     def run_full_analysis(self):
-        raw_scores = self._calculate_raw_scores()
+        a = self.arrays
+        raw = raw_score_array(a["weight"], a["rc"], a["present"])
+        groups = score_raw_matrix(raw)
         return {
-            "lobes": self._calculate_lobes(raw_scores),
-            "hemispheres": self._calculate_hemispheres(raw_scores),
+            "lobes": _rounded_dict(LOBE_KEYS, groups["lobes"]),
+            "hemispheres": _rounded_dict(HEMISPHERE_KEYS, groups["hemispheres"]),
             "tfrc": int(self.data['ridge_count'].sum()) if not self.data.empty else 0,
-            "multiple_intelligences": self._calculate_multiple_intelligences(raw_scores),
-            "learning_styles": self._calculate_learning_styles(raw_scores),
-            "raw_scores": raw_scores
+            "multiple_intelligences": _rounded_dict(MI_KEYS, groups["multiple_intelligences"]),
+            "learning_styles": _rounded_dict(LEARNING_STYLE_KEYS, groups["learning_styles"]),
+            "raw_scores": {FINGER_CODES[i]: float(raw[i]) for i in np.flatnonzero(a["present"])}
         }
 
-    def _calculate_raw_scores(self):
-        scores = {}
-        # Ağırlıklar: Whorl (W)=10, S=9, RL=8, UL=7, AT=5, A=4
-        weights = {"W": 10, "S": 9, "RL": 8, "UL": 7, "AT": 5, "A": 4, "Unknown": 4}
-
-        for _, row in self.data.iterrows():
-            code = row['finger_code']
-            ptype = row['pattern_type']
-            rc = row['ridge_count']
-            
-            # Formül: Desen Ağırlığı + (Sırt Sayısı * 0.5)
-            # RC potansiyeli artırır.
-            base_val = weights.get(ptype, 5)
-            final_val = base_val + (rc * 0.5)
-            scores[code] = final_val
-            
-        return scores
-
-    def _calculate_lobes(self, s):
-        # L1/R1: Prefrontal, L2/R2: Frontal, L3/R3: Parietal, L4/R4: Temporal, L5/R5: Occipital
-        lobes = {
-            "Prefrontal (Kişilik)": s.get('L1', 0) + s.get('R1', 0),
-            "Frontal (Mantık)": s.get('L2', 0) + s.get('R2', 0),
-            "Parietal (Kinestetik)": s.get('L3', 0) + s.get('R3', 0),
-            "Temporal (İşitsel)": s.get('L4', 0) + s.get('R4', 0),
-            "Occipital (Görsel)": s.get('L5', 0) + s.get('R5', 0)
-        }
-        total = sum(lobes.values()) or 1
-        return {k: round((v/total)*100, 1) for k, v in lobes.items()}
+    # -------------------------------------------------------------------------
+    # TOPLU (KOHORT) PUANLAMA
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def score_batch(pattern_codes, ridge_counts):
+        """
+        Çok sayıda öğrenciyi tek vektörel geçişte puanlar (öğrenci başına nesne kurulmaz).
 
-    def _calculate_hemispheres(self, s):
-        left_val = sum([v for k, v in s.items() if k.startswith('L')])
-        right_val = sum([v for k, v in s.items() if k.startswith('R')])
-        total = left_val + right_val or 1
-        return {
-            "Sol Beyin (Analitik)": round((right_val / total) * 100, 1), # Sağ el sol beyni yönetir
-            "Sağ Beyin (Yaratıcı)": round((left_val / total) * 100, 1)   # Sol el sağ beyni yönetir
-        }
+        Args:
+            pattern_codes: (N x 10) desen kodları, sütunlar FINGER_CODES sırasında (L1..R5).
+                           Boş hücre (None/NaN/"") eksik parmak demektir.
+            ridge_counts:  (N x 10) sırt sayıları (eksik parmaklarda yok sayılır).
+
+        Dönüş:
+            dict: lobes, hemispheres, multiple_intelligences, learning_styles -> (N x k) yüzde
+                  dizileri (sütun isimleri için "columns"), tfrc -> (N,), raw_scores -> (N x 10)
+        """
+        weight, present = pattern_weight_array(pattern_codes)
+        rc = np.nan_to_num(np.asarray(ridge_counts, dtype=float))
+        rc = np.where(present, rc, 0.0)
+        raw = raw_score_array(weight, rc, present)
 
-    def _calculate_multiple_intelligences(self, s):
-        # Simülasyon Ağırlıkları
-        mi = {
-            "İçsel (Intrapersonal)": s.get('L1', 0) * 1.2,
-            "Sosyal (Interpersonal)": s.get('R1', 0) * 1.2,
-            "Mantıksal": s.get('R2', 0) * 1.5,
-            "Sözel/Dilsel": s.get('R4', 0) + s.get('L4', 0),
-            "Görsel/Uzamsal": s.get('L2', 0) + s.get('R5', 0),
-            "Müziksel": s.get('L4', 0) * 1.3,
-            "Bedensel/Kinestetik": s.get('L3', 0) + s.get('R3', 0),
-            "Doğasal": s.get('L5', 0) + s.get('R5', 0)
+        results = score_raw_matrix(raw)
+        results["tfrc"] = rc.sum(axis=1).astype(int)
+        results["raw_scores"] = raw
+        results["columns"] = {name: list(keys) for name, keys, _ in SCORE_GROUPS}
+        return results
+
+    @staticmethod
+    def frame_to_batch(df, by="student_name"):
+        """
+        Birden çok öğrencinin uzun formattaki kayıtlarını (N x 10) matrislere çevirir.
+        Aynı öğrenci/parmak için son kayıt geçerlidir; tanımsız parmak kodları atlanır.
+
+        Dönüş:
+            (ids, pattern_codes, ridge_counts)
+        """
+        rows = df[df['finger_code'].isin(FINGER_CODES)]
+        student_idx, ids = pd.factorize(rows[by], sort=True)
+        finger_idx = rows['finger_code'].map(FINGER_INDEX).to_numpy()
+
+        # Tekrarlı (öğrenci, parmak) çiftlerinde son kaydı seç: ters sırada ilk görülen
+        slot = (student_idx * len(FINGER_CODES) + finger_idx)[::-1]
+        _, first = np.unique(slot, return_index=True)
+        last = len(slot) - 1 - first
+        student_idx, finger_idx = student_idx[last], finger_idx[last]
+        rows = rows.iloc[last]
+
+        pattern_codes = np.full((len(ids), len(FINGER_CODES)), None, dtype=object)
+        ridge_counts = np.zeros((len(ids), len(FINGER_CODES)))
+        # Deseni boş olan ama kaydı bulunan parmak, tekli motordaki gibi varsayılan ağırlık alır
+        pattern_codes[student_idx, finger_idx] = rows['pattern_type'].fillna("?").to_numpy()
+        ridge_counts[student_idx, finger_idx] = rows['ridge_count'].fillna(0).to_numpy(dtype=float)
+        return list(ids), pattern_codes, ridge_counts
+
+    @classmethod
+    def score_frame(cls, df, by="student_name"):
+        """Uzun formattaki çoklu öğrenci kaydını toplu puanlar. Dönüş: score_batch sonucu + "ids"."""
+        ids, pattern_codes, ridge_counts = cls.frame_to_batch(df, by=by)
+        results = cls.score_batch(pattern_codes, ridge_counts)
+        results["ids"] = ids
+        return results
+
+# -----------------------------------------------------------------------------
+# TEK PUANLAMA SERVİSİ (SÜRÜMLÜ)
+# -----------------------------------------------------------------------------
+# Aşağıdaki formüllerden herhangi biri değişirse sürüm artırılmalıdır;
+# veritabanında saklanan puanlar sürüm uyuşmazlığında yeniden hesaplanır.
+SCORING_VERSION = "dmit-scores-v1"
+
+# Meslek/Eğitim grupları (10 slotlu sırt sayısı dizisi üzerinde)
+GROUP_KEYS, GROUP_MATRIX = slot_matrix({
+    "Teknik": {"L1": 1, "R1": 1, "L3": 1, "R3": 1},
+    "Sosyal": {"L4": 1, "R4": 1, "L2": 1, "R2": 1},
+    "Matematik": {"L2": 1, "R2": 1, "L3": 1, "R3": 1},
+    "Fen": {"L5": 1, "R5": 1, "L3": 1, "R3": 1},
+})
+
+# Lob sırası: Sağ el (R1..R5) sol beyin, sol el (L1..L5) sağ beyin
+LOBE_STAT_KEYS = ["Sol_Prefrontal", "Sol_Frontal", "Sol_Parietal", "Sol_Temporal", "Sol_Occipital",
+                  "Sag_Prefrontal", "Sag_Frontal", "Sag_Parietal", "Sag_Temporal", "Sag_Occipital"]
+
+def input_signature(df):
+    """Puanlamaya giren alanların (parmak, desen, sırt sayısı) özeti; girdiler değişince değişir."""
+    if df.empty:
+        return hashlib.sha256(b"[]").hexdigest()
+    rows = df[['finger_code', 'pattern_type', 'ridge_count']].astype(str).to_numpy().tolist()
+    return hashlib.sha256(json.dumps(rows, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def dashboard_scores(df):
+    """Öğretmen panelindeki grafikler için özet puanlar (TFRC, desen sayıları, basit lob dağılımı)."""
+    if df.empty:
+        return {}
+
+    arrays = finger_arrays(df)
+    total_rc = arrays["rc"].sum()
+    # Pattern analizleri: 10 slotun desen kodunda geçen harfe göre (UL, RL, L hepsi döngü)
+    whorl_count = sum("W" in pattern for pattern in arrays["pattern"])
+    loop_count = sum("L" in pattern for pattern in arrays["pattern"])
+
+    return {
+        "tfrc": int(total_rc),
+        "whorl_count": whorl_count,
+        "loop_count": loop_count,
+        "learning_potential": "Yüksek" if total_rc > 100 else "Normal",
+        "lobes": {
+            "prefrontal": 20 + (whorl_count * 2),
+            "frontal": 20,
+            "parietal": 20,
+            "temporal": 20 + (loop_count * 2),
+            "occipital": 20
         }
-        total = sum(mi.values()) or 1
-        return {k: round((v/total)*100, 1) for k, v in mi.items()}
-
-    def _calculate_learning_styles(self, s):
-        # VAK Modeli
-        visual = s.get('L5', 0) + s.get('R5', 0) + s.get('L2', 0)
-        auditory = s.get('L4', 0) + s.get('R4', 0)
-        kinesthetic = s.get('L3', 0) + s.get('R3', 0) + s.get('R2', 0)
-        
-        total = visual + auditory + kinesthetic or 1
-        return {
-            "Görsel (Visual)": round((visual/total)*100, 1),
-            "İşitsel (Auditory)": round((auditory/total)*100, 1),
-            "Kinestetik (Dokunsal)": round((kinesthetic/total)*100, 1)
-        }
\ No newline at end of file
+    }
+
+def advanced_stats(df):
+    """Rapor prompt'una giren kesin istatistikler (lob yüzdeleri, meslek grupları, baskın beyin)."""
+    if df.empty:
+        return {}
+
+    # TFRC
+    tfrc = df['ridge_count'].sum()
+    if tfrc == 0: tfrc = 1
+
+    rc = finger_arrays(df)["rc"]
+
+    # Lobes
+    lobe_values = np.concatenate([rc[5:], rc[:5]]) / tfrc * 100
+    lobe_percentages = {k: float(v) for k, v in zip(LOBE_STAT_KEYS, lobe_values)}
+
+    # Groups
+    group_values = GROUP_MATRIX @ rc / tfrc * 100
+    groups = {k: float(v) for k, v in zip(GROUP_KEYS, group_values)}
+    groups["Genel"] = (tfrc / 5) / tfrc * 100
+
+    # Dominance
+    sag_beyin = int(rc[:5].sum())
+    sol_beyin = int(rc[5:].sum())
+    dominance = "Sağ Beyin Baskın" if sag_beyin > sol_beyin else "Sol Beyin Baskın"
+
+    return {
+        "tfrc": int(tfrc),
+        "lobes": lobe_percentages,
+        "groups": groups,
+        "dominance": dominance,
+        "sag_beyin_total": sag_beyin,
+        "sol_beyin_total": sol_beyin
+    }
+
+def compute_scores(df):
+    """
+    Bir öğrencinin tüm puanlarını tek yerden hesaplar.
+
+    Dönüş:
+        dict: version, input_hash, dashboard (panel), advanced (rapor), profile (DMITEngine sonuçları)
+              - JSON'a çevrilebilir, veritabanında olduğu gibi saklanır.
+    """
+    if df.empty:
+        return {}
+    return {
+        "version": SCORING_VERSION,
+        "input_hash": input_signature(df),
+        "dashboard": dashboard_scores(df),
+        "advanced": advanced_stats(df),
+        "profile": DMITEngine(df).results,
+    }
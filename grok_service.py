@@ -2,11 +2,17 @@
 import os
 import json
 import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
 import pandas as pd
 from openai import OpenAI
 from dotenv import load_dotenv
 
+import disk_cache
+import api_client
+import dmit_engine
+
 # -----------------------------------------------------------------------------
 # 1. HİBRİT MİMARİ KONTROLÜ
 # -----------------------------------------------------------------------------
@@ -17,6 +23,12 @@ except ImportError:
     OPENCV_AVAILABLE = False
     print("BİLGİ: image_utils.py bulunamadı. Standart mod devrede.")
 
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
 # -----------------------------------------------------------------------------
 # 2. API VE MODEL AYARLARI
 # -----------------------------------------------------------------------------
@@ -29,82 +41,140 @@ except (FileNotFoundError, KeyError, AttributeError):
 if not GROK_API_KEY:
     GROK_API_KEY = "key-not-found"
 
-client = OpenAI(api_key=GROK_API_KEY, base_url="https://api.x.ai/v1")
+# Yeniden deneme kütüphane yerine api_client katmanında yapılır (max_retries=0)
+# GROK_BASE_URL ile yerel bir sahte (fake) sunucuya yönlendirilerek test edilebilir
+GROK_BASE_URL = os.getenv("GROK_BASE_URL", "https://api.x.ai/v1")
+client = OpenAI(api_key=GROK_API_KEY, base_url=GROK_BASE_URL, max_retries=0)
+
+# Zaman aşımı (sn), yeniden deneme ve devre kesici ayarları
+VISION_TIMEOUT = float(os.getenv("VISION_TIMEOUT", "60"))
+REPORT_TIMEOUT = float(os.getenv("REPORT_TIMEOUT", "300"))
+api = api_client.ResilientClient(
+    client,
+    max_retries=int(os.getenv("API_MAX_RETRIES", "3")),
+    breaker=api_client.CircuitBreaker(
+        failure_threshold=int(os.getenv("API_BREAKER_THRESHOLD", "5")),
+        reset_timeout=float(os.getenv("API_BREAKER_RESET", "30"))
+    )
+)
 
 # Modeller
 VISION_MODEL = "grok-4" 
 REASONING_MODEL = "grok-4-1-fast-reasoning"
 
+# Eşzamanlı analiz: Aynı anda en fazla kaç parmak Vision API'ye gönderilir
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "5"))
+
+# Vision sonuç önbelleği: Aynı resim + parmak + model + prompt sürümü tekrar API'ye gitmez.
+# Prompt metni değiştiğinde VISION_PROMPT_VERSION artırılmalıdır.
+VISION_PROMPT_VERSION = "vision-v2"
+VISION_CACHE_DIR = os.getenv("VISION_CACHE_DIR", os.path.join(".cache", "vision"))
+VISION_CACHE_MAX_ENTRIES = int(os.getenv("VISION_CACHE_MAX_ENTRIES", "5000"))
+vision_cache = disk_cache.DiskCache(VISION_CACHE_DIR, max_entries=VISION_CACHE_MAX_ENTRIES)
+
+# Yerel desen sınıflandırıcı (image_utils.classify_pattern, yönelim alanı + Poincaré):
+#   off    : Her parmak tam Vision prompt'u ile analiz edilir (varsayılan)
+#   verify : Güveni eşiği geçen parmaklar kısa doğrulama prompt'u ile VERIFY_MODEL'e gider
+#   skip   : verify + yüksek güvenli ve yerel RC'si güvenilir parmaklar hiç API'ye gönderilmez
+LOCAL_CLASSIFIER_MODE = os.getenv("LOCAL_CLASSIFIER_MODE", "off")
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.8"))
+LOCAL_SKIP_TYPES = tuple(os.getenv("LOCAL_SKIP_TYPES", "A,AT,UL,RL,W,S").split(","))
+VERIFY_MODEL = os.getenv("VERIFY_MODEL", VISION_MODEL)
+VERIFY_PROMPT_VERSION = "verify-v1"
+VERIFY_MAX_TOKENS = int(os.getenv("VERIFY_MAX_TOKENS", "300"))
+
+# Vision'ın RC değeri iskelet üzerindeki yerel delta-çekirdek sayımıyla karşılaştırılır
+# (sonuca rc_local / rc_check eklenir). Fark toleransı aşarsa rc_check="mismatch".
+LOCAL_RC_CHECK = os.getenv("LOCAL_RC_CHECK", "1") == "1"
+LOCAL_RC_TOLERANCE = int(os.getenv("LOCAL_RC_TOLERANCE", "3"))
+
+# Kalite kapısı (image_utils.quality_gate): Reddedilen resimler Vision'a gönderilmeden "Unknown" sonucu
+# ile döner. Varsayılan uyarı modunda (QUALITY_GATE_MODE=warn) yalnızca okunamayan / bulanık resimler reddedilir;
+# boş, karanlık/aşırı pozlanmış, ortalanmamış veya sırtsız resimler için QUALITY_GATE_MODE=reject gerekir
+QUALITY_GATE = os.getenv("QUALITY_GATE", "1") == "1"
+
+# Bölüm bölüm rapor: Her bölüm ayrı istekle paralel yazılır ve ayrı önbelleğe alınır
+REPORT_PROMPT_VERSION = "report-v1"
+REPORT_SECTION_CONCURRENCY = int(os.getenv("REPORT_SECTION_CONCURRENCY", "13"))
+REPORT_SECTION_MAX_TOKENS = int(os.getenv("REPORT_SECTION_MAX_TOKENS", "1200"))
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(".cache", "report_sections"))
+report_section_cache = disk_cache.DiskCache(REPORT_CACHE_DIR, max_entries=2000)
+
+# Sağlayıcı tarafı prompt önbelleği: İstekler aynı sohbet kimliğiyle gönderilir ki sabit
+# sistem prompt'u önbellekteki önekle eşleşsin (xAI: x-grok-conv-id başlığı).
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "1") == "1"
+prompt_cache_stats = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+
 def encode_image(image_bytes):
     return base64.b64encode(image_bytes).decode('utf-8')
 
+def image_digest(image_bytes):
+    """Resim içeriğinin SHA-256 özeti (OpenCV hattı varsa onun hesapladığı kullanılır)."""
+    if OPENCV_AVAILABLE:
+        return image_utils.get_pipeline(image_bytes).digest
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def vision_cache_key(image_bytes, finger_label, verify=False):
+    # Doğrulama yanıtları tam analizden ayrı anahtarda tutulur (mod değişince karışmaz)
+    parts = [image_digest(image_bytes), finger_label]
+    parts += [VERIFY_MODEL, VERIFY_PROMPT_VERSION] if verify else [VISION_MODEL, VISION_PROMPT_VERSION]
+    # Vision'a iskelet gider; iyileştirme modu değişince eski yanıtlar kullanılmaz
+    # (varsayılan "classic" anahtara girmez, mevcut önbellek geçerli kalır)
+    if OPENCV_AVAILABLE and image_utils.ENHANCEMENT_MODE != "classic":
+        parts.append(image_utils.ENHANCEMENT_MODE)
+    return disk_cache.make_key(*parts)
+
+def prompt_cache_headers(prompt_id):
+    """Önek önbelleği açıksa, aynı sabit prompt için aynı yönlendirme kimliğini döner."""
+    if not PROMPT_CACHE_ENABLED:
+        return None
+    return {"x-grok-conv-id": f"balaban-{prompt_id}"}
+
+def record_prompt_cache_usage(response):
+    """Yanıttaki önbellekten okunan token sayısını sayaçlara ekler (destekleyen sağlayıcılarda)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    prompt_cache_stats["requests"] += 1
+    prompt_cache_stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+    prompt_cache_stats["cached_tokens"] += (getattr(details, "cached_tokens", 0) or 0) if details else 0
+
+def prompt_size_report(text):
+    """
+    Prompt boyutu: bayt, karakter ve token sayısı.
+    tiktoken kuruluysa gerçek sayım, değilse ~4 bayt/token tahmini kullanılır.
+    """
+    size = {"bytes": len(text.encode("utf-8")), "chars": len(text)}
+    if TIKTOKEN_AVAILABLE:
+        size["tokens"] = len(tiktoken.get_encoding("o200k_base").encode(text))
+        size["token_source"] = "tiktoken"
+    else:
+        size["tokens"] = size["bytes"] // 4
+        size["token_source"] = "tahmini"
+    return size
+
 # -----------------------------------------------------------------------------
 # 3. MATEMATİKSEL HESAPLAMA MOTORU (Python Tarafı - Sıfır Hata)
 # -----------------------------------------------------------------------------
 def calculate_advanced_stats(finger_data):
-    if finger_data.empty: return {}
-    
-    # TFRC
-    tfrc = finger_data['ridge_count'].sum()
-    if tfrc == 0: tfrc = 1
-
-    rc = {row['finger_code']: row['ridge_count'] for _, row in finger_data.iterrows()}
-    for code in ["L1","L2","L3","L4","L5","R1","R2","R3","R4","R5"]:
-        if code not in rc: rc[code] = 0
-
-    # Lobes
-    lobes = {
-        "Sol_Prefrontal": rc.get('R1',0), "Sol_Frontal": rc.get('R2',0), "Sol_Parietal": rc.get('R3',0), "Sol_Temporal": rc.get('R4',0), "Sol_Occipital": rc.get('R5',0),
-        "Sag_Prefrontal": rc.get('L1',0), "Sag_Frontal": rc.get('L2',0), "Sag_Parietal": rc.get('L3',0), "Sag_Temporal": rc.get('L4',0), "Sag_Occipital": rc.get('L5',0)
-    }
-    lobe_percentages = {k: (v / tfrc * 100) for k, v in lobes.items()}
-
-    # Groups
-    teknik = (rc['L1'] + rc['R1'] + rc['L3'] + rc['R3']) 
-    sosyal = (rc['L4'] + rc['R4'] + rc['L2'] + rc['R2'])
-    matematik = (rc['L2'] + rc['R2'] + rc['L3'] + rc['R3'])
-    fen = (rc['L5'] + rc['R5'] + rc['L3'] + rc['R3'])
-    genel = tfrc / 5 
-
-    # Dominance
-    sag_beyin = sum([rc[f] for f in ['L1','L2','L3','L4','L5']])
-    sol_beyin = sum([rc[f] for f in ['R1','R2','R3','R4','R5']])
-    dominance = "Sağ Beyin Baskın" if sag_beyin > sol_beyin else "Sol Beyin Baskın"
-    
-    return {
-        "tfrc": int(tfrc),
-        "lobes": lobe_percentages,
-        "groups": {"Teknik": (teknik/tfrc*100), "Sosyal": (sosyal/tfrc*100), "Matematik": (matematik/tfrc*100), "Fen": (fen/tfrc*100), "Genel": (genel/tfrc*100)},
-        "dominance": dominance,
-        "sag_beyin_total": sag_beyin,
-        "sol_beyin_total": sol_beyin
-    }
+    # Formüller dmit_engine'deki tek, sürümlü puanlama servisinde
+    return dmit_engine.advanced_stats(finger_data)
+
+def report_stats(finger_data, scores=None):
+    """Saklanmış puanlar (db_manager.get_student_scores) verildiyse onları, yoksa yeni hesabı döner."""
+    if scores and scores.get("advanced"):
+        return scores["advanced"]
+    return calculate_advanced_stats(finger_data)
 
 # -----------------------------------------------------------------------------
 # 4. GÖRÜNTÜ ANALİZİ (VISION) - 80-SHOT PROMPT (FULL)
 # -----------------------------------------------------------------------------
-def analyze_fingerprint(image_bytes, finger_label):
-    if not GROK_API_KEY or GROK_API_KEY == "key-not-found":
-        return {"type": "Hata", "rc": 0, "confidence": "Yok", "note": "API Key Eksik", "dmit_insight": "Demo"}
-
-    final_image_bytes = image_bytes
-    is_processed = False
-    
-    if OPENCV_AVAILABLE:
-        try:
-            processed_bytes = image_utils.process_fingerprint(image_bytes)
-            if processed_bytes:
-                final_image_bytes = processed_bytes
-                is_processed = True
-        except Exception as e:
-            print(f"OpenCV Hata: {e}")
-
-    base64_image = encode_image(final_image_bytes)
-    image_status_note = "PRE-PROCESSED (Skeletonized & High-Contrast)" if is_processed else "RAW IMAGE"
-
-    # NOT: f-string içinde JSON kullanırken süslü parantezleri {{ }} şeklinde çiftlemeliyiz.
-    system_prompt = f"""
-You are the ultimate forensic dermatoglyphics authority for Balaban Koçluk Genetic Test DMIT reports. Analyze the SINGLE {image_status_note} fingerprint image with ABSOLUTE PRECISION and ZERO HALLUCINATION, fusing Harold Cummins fetal principles with FBI ridge counting standards.
+# Sabit sistem prompt'u: Import anında bir kez oluşturulur ve her çağrıda bayt bayt aynıdır.
+# Resme özel bilgiler (parmak etiketi, işlenme durumu) kullanıcı mesajına taşındı; böylece
+# sağlayıcı tarafında önek (prefix) önbelleği kullanılabilir.
+VISION_SYSTEM_PROMPT = """
+You are the ultimate forensic dermatoglyphics authority for Balaban Koçluk Genetic Test DMIT reports. Analyze the SINGLE fingerprint image (its processing status is given in the user message) with ABSOLUTE PRECISION and ZERO HALLUCINATION, fusing Harold Cummins fetal principles with FBI ridge counting standards.
 
 ESSENTIAL ASSUMPTIONS:
 - One fingertip only, tip upward (distal top).
@@ -135,285 +205,513 @@ MATHEMATICAL ZERO-ERROR REASONING (step-by-step):
 LEARN FROM THESE 80 DETAILED FEW-SHOT EXAMPLES (mimic exactly for precision - each based on real PDF variations):
 
 Few-Shot 1: High RC Whorl Perfect Concentric (from Ahmet Arif Yılmaz high whorl example)
-{{ "type": "W", "rc": 28, "confidence": "High", "note": "Perfect concentric whorl in skeletonized image, higher delta-core exactly 28 ridges, no islands visible.", "dmit_insight": "Very high RC whorl indicates exceptional analytical and technical aptitude, often linked to 82%+ Teknik scores in Genetic Test reports (fetal prefrontal ridge density strong)." }}
+{ "type": "W", "rc": 28, "confidence": "High", "note": "Perfect concentric whorl in skeletonized image, higher delta-core exactly 28 ridges, no islands visible.", "dmit_insight": "Very high RC whorl indicates exceptional analytical and technical aptitude, often linked to 82%+ Teknik scores in Genetic Test reports (fetal prefrontal ridge density strong)." }
 
 Few-Shot 2: Medium RC Ulnar Loop Clear Opening (from ahmet aziz doğan loop example)
-{{ "type": "UL", "rc": 15, "confidence": "High", "note": "Clear ulnar loop opening rightward in perfect skeleton, 15 ridges crossed precisely with no islands.", "dmit_insight": "Medium RC loop suggests solid practical and interpersonal skills, similar to 35% Uygulama or higher İletişim contributions (fetal parietal balance moderate)." }}
+{ "type": "UL", "rc": 15, "confidence": "High", "note": "Clear ulnar loop opening rightward in perfect skeleton, 15 ridges crossed precisely with no islands.", "dmit_insight": "Medium RC loop suggests solid practical and interpersonal skills, similar to 35% Uygulama or higher İletişim contributions (fetal parietal balance moderate)." }
 
 Few-Shot 3: Low RC Plain Arch Smooth No Delta (from Berrin Gülhan arch example)
-{{ "type": "A", "rc": 0, "confidence": "High", "note": "Smooth plain arch with absolutely no delta in skeletonized image.", "dmit_insight": "Low RC arch may indicate balanced but lower intensity in certain lobes, potentially increasing health risk factors in reports (fetal general low ridge formation)." }}
+{ "type": "A", "rc": 0, "confidence": "High", "note": "Smooth plain arch with absolutely no delta in skeletonized image.", "dmit_insight": "Low RC arch may indicate balanced but lower intensity in certain lobes, potentially increasing health risk factors in reports (fetal general low ridge formation)." }
 
 Few-Shot 4: Tented Arch Low RC Central Spike (from alper okten tented example)
-{{ "type": "AT", "rc": 4, "confidence": "High", "note": "Central upward tent spike clearly visible in skeleton, low ridge count exactly 4.", "dmit_insight": "Tented arch transition form with moderate potential, often seen in balanced transitional lobes (fetal ridge spike formation)." }}
+{ "type": "AT", "rc": 4, "confidence": "High", "note": "Central upward tent spike clearly visible in skeleton, low ridge count exactly 4.", "dmit_insight": "Tented arch transition form with moderate potential, often seen in balanced transitional lobes (fetal ridge spike formation)." }
 
 Few-Shot 5: Radial Loop Rare Medium RC Thumb Opening (from ahmet talha darbaş rare RL example)
-{{ "type": "RL", "rc": 12, "confidence": "High", "note": "Rare radial loop opening toward thumb side, 12 ridges counted in skeleton.", "dmit_insight": "Rare radial loop suggests innovative and unconventional thinking potential (fetal prefrontal variant ridge flow)." }}
+{ "type": "RL", "rc": 12, "confidence": "High", "note": "Rare radial loop opening toward thumb side, 12 ridges counted in skeleton.", "dmit_insight": "Rare radial loop suggests innovative and unconventional thinking potential (fetal prefrontal variant ridge flow)." }
 
 Few-Shot 6: Double Loop High Interlocking S-Shape (from betül gülebakan creativity high example)
-{{ "type": "S", "rc": 26, "confidence": "High", "note": "Clear interlocking S-shape double loop in skeleton, higher delta exactly 26 ridges.", "dmit_insight": "High RC double loop indicates strong creativity and complex thinking, similar to 65% Yaratıcılık scores (fetal occipital/temporal interlocking strong)." }}
+{ "type": "S", "rc": 26, "confidence": "High", "note": "Clear interlocking S-shape double loop in skeleton, higher delta exactly 26 ridges.", "dmit_insight": "High RC double loop indicates strong creativity and complex thinking, similar to 65% Yaratıcılık scores (fetal occipital/temporal interlocking strong)." }
 
 Few-Shot 7: Whorl with Double Islands Double-Count (from Akın Sevinç complex whorl example)
-{{ "type": "W", "rc": 24, "confidence": "High", "note": "Concentric whorl with 2 islands precisely double-counted in skeleton, total 24 ridges.", "dmit_insight": "Islands add complexity, enhanced analytical depth and multi-tasking potential (fetal prefrontal enhanced bifurcation)." }}
+{ "type": "W", "rc": 24, "confidence": "High", "note": "Concentric whorl with 2 islands precisely double-counted in skeleton, total 24 ridges.", "dmit_insight": "Islands add complexity, enhanced analytical depth and multi-tasking potential (fetal prefrontal enhanced bifurcation)." }
 
 Few-Shot 8: Blurry Low Confidence Heavy Noise Unknown (general low quality example)
-{{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Heavy residual noise even after skeletonization, core/delta ambiguous - professional re-scan recommended.", "dmit_insight": "Insufficient quality for reliable DMIT insight - ink scan advised for fetal ridge accuracy." }}
+{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Heavy residual noise even after skeletonization, core/delta ambiguous - professional re-scan recommended.", "dmit_insight": "Insufficient quality for reliable DMIT insight - ink scan advised for fetal ridge accuracy." }
 
 Few-Shot 9: Pocket Whorl Variant High Pocket (from Ahmet genç pocket variant example)
-{{ "type": "W", "rc": 30, "confidence": "High", "note": "Central pocket loop whorl variant clearly visible, higher delta exactly 30 ridges in skeleton.", "dmit_insight": "Exceptional RC pocket whorl for engineering/technical excellence, linked to 82%+ Teknik (fetal parietal/prefrontal peak pocket)." }}
+{ "type": "W", "rc": 30, "confidence": "High", "note": "Central pocket loop whorl variant clearly visible, higher delta exactly 30 ridges in skeleton.", "dmit_insight": "Exceptional RC pocket whorl for engineering/technical excellence, linked to 82%+ Teknik (fetal parietal/prefrontal peak pocket)." }
 
 Few-Shot 10: Medium Confidence Ulnar Loop Minor Noise (from Abdullah Türkyılmaz loop noise example)
-{{ "type": "UL", "rc": 18, "confidence": "Medium", "note": "Minor residual noise but clear ulnar loop in skeleton, conservative 18 ridges counted.", "dmit_insight": "Solid medium RC loop for practical and social balance (fetal temporal moderate with minor variation)." }}
+{ "type": "UL", "rc": 18, "confidence": "Medium", "note": "Minor residual noise but clear ulnar loop in skeleton, conservative 18 ridges counted.", "dmit_insight": "Solid medium RC loop for practical and social balance (fetal temporal moderate with minor variation)." }
 
 Few-Shot 11: Low RC Tented Arch Spike Low (from Ahsen Yazıcıoğlu tented low example)
-{{ "type": "AT", "rc": 5, "confidence": "High", "note": "Central spike visible in skeleton, low 5 ridges precisely.", "dmit_insight": "Low RC tented arch moderate transition potential (fetal ridge spike low density)." }}
+{ "type": "AT", "rc": 5, "confidence": "High", "note": "Central spike visible in skeleton, low 5 ridges precisely.", "dmit_insight": "Low RC tented arch moderate transition potential (fetal ridge spike low density)." }
 
 Few-Shot 12: High RC Double Loop with Islands (from Ahmet Yavuz Gece complex S example)
-{{ "type": "S", "rc": 29, "confidence": "High", "note": "Interlocking S with 3 islands double-counted in skeleton, higher 29 ridges.", "dmit_insight": "Very high RC with islands strong creative complexity (%65+ Yaratıcılık fetal occipital enhanced)." }}
+{ "type": "S", "rc": 29, "confidence": "High", "note": "Interlocking S with 3 islands double-counted in skeleton, higher 29 ridges.", "dmit_insight": "Very high RC with islands strong creative complexity (%65+ Yaratıcılık fetal occipital enhanced)." }
 
 Few-Shot 13: Medium RC Radial Rare Thumb (from arif açıkgöz rare RL example)
-{{ "type": "RL", "rc": 14, "confidence": "High", "note": "Radial opening clear in skeleton, 14 ridges.", "dmit_insight": "Medium RC rare radial innovative edge (fetal prefrontal thumb flow variant)." }}
+{ "type": "RL", "rc": 14, "confidence": "High", "note": "Radial opening clear in skeleton, 14 ridges.", "dmit_insight": "Medium RC rare radial innovative edge (fetal prefrontal thumb flow variant)." }
 
 Few-Shot 14: Whorl Medium Confidence Minor Noise (from ahmet selim çoban whorl blur example)
-{{ "type": "W", "rc": 20, "confidence": "Medium", "note": "Minor noise but concentric visible in skeleton, conservative 20 ridges.", "dmit_insight": "Medium RC whorl analytical moderate (fetal prefrontal with minor variation)." }}
+{ "type": "W", "rc": 20, "confidence": "Medium", "note": "Minor noise but concentric visible in skeleton, conservative 20 ridges.", "dmit_insight": "Medium RC whorl analytical moderate (fetal prefrontal with minor variation)." }
 
 Few-Shot 15: Plain Arch Perfect Zero (from Alperen Adıgüzel arch example)
-{{ "type": "A", "rc": 0, "confidence": "High", "note": "Perfect smooth arch no delta in skeleton.", "dmit_insight": "Zero RC balanced low intensity (fetal general low ridge)." }}
+{ "type": "A", "rc": 0, "confidence": "High", "note": "Perfect smooth arch no delta in skeleton.", "dmit_insight": "Zero RC balanced low intensity (fetal general low ridge)." }
 
 Few-Shot 16: Ulnar High with Double Islands (from akif eker loop islands example)
-{{ "type": "UL", "rc": 22, "confidence": "High", "note": "Ulnar with 2 islands double-counted in skeleton, 22 ridges.", "dmit_insight": "High RC loop with islands strong practical complexity (fetal parietal islands enhanced)." }}
+{ "type": "UL", "rc": 22, "confidence": "High", "note": "Ulnar with 2 islands double-counted in skeleton, 22 ridges.", "dmit_insight": "High RC loop with islands strong practical complexity (fetal parietal islands enhanced)." }
 
 Few-Shot 17: Spiral Variant Medium Pocket (from Alperen Özdemir spiral example)
-{{ "type": "W", "rc": 21, "confidence": "High", "note": "Spiral variant higher delta 21 ridges in skeleton.", "dmit_insight": "Medium-high RC spiral technical balance (fetal parietal spiral moderate)." }}
+{ "type": "W", "rc": 21, "confidence": "High", "note": "Spiral variant higher delta 21 ridges in skeleton.", "dmit_insight": "Medium-high RC spiral technical balance (fetal parietal spiral moderate)." }
 
 Few-Shot 18: Unknown Blurry Residual (from Ali Emirhan Ercan low quality example)
-{{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Residual blur insufficient skeleton, re-scan.", "dmit_insight": "Quality low - no reliable insight." }}
+{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Residual blur insufficient skeleton, re-scan.", "dmit_insight": "Quality low - no reliable insight." }
 
 Few-Shot 19: Double Loop Medium Interlocking (from Asude Verda Özdemir S medium example)
-{{ "type": "S", "rc": 20, "confidence": "High", "note": "Interlocking medium 20 ridges in skeleton.", "dmit_insight": "Medium RC double loop creativity moderate (fetal occipital interlocking)." }}
+{ "type": "S", "rc": 20, "confidence": "High", "note": "Interlocking medium 20 ridges in skeleton.", "dmit_insight": "Medium RC double loop creativity moderate (fetal occipital interlocking)." }
 
 Few-Shot 20: Whorl Clean High No Islands (from ahmet yusuf karadogan clean whorl example)
-{{ "type": "W", "rc": 25, "confidence": "High", "note": "Clean concentric no islands in skeleton, 25 ridges.", "dmit_insight": "High RC clean whorl pure analytical strength (fetal prefrontal clean high)." }}
+{ "type": "W", "rc": 25, "confidence": "High", "note": "Clean concentric no islands in skeleton, 25 ridges.", "dmit_insight": "High RC clean whorl pure analytical strength (fetal prefrontal clean high)." }
 
 Few-Shot 21: Low RC Arch with Minor Spike (from alper okten low arch example)
-{{ "type": "A", "rc": 0, "confidence": "High", "note": "Smooth arch with minor variation, no delta.", "dmit_insight": "Low RC balanced low (fetal general minimal)." }}
+{ "type": "A", "rc": 0, "confidence": "High", "note": "Smooth arch with minor variation, no delta.", "dmit_insight": "Low RC balanced low (fetal general minimal)." }
 
 Few-Shot 22: High RC Ulnar Perfect (from betül genç high loop example)
-{{ "type": "UL", "rc": 23, "confidence": "High", "note": "Perfect ulnar high 23 ridges.", "dmit_insight": "High RC ulnar strong practical/social (%76+ Sosyal similar)." }}
+{ "type": "UL", "rc": 23, "confidence": "High", "note": "Perfect ulnar high 23 ridges.", "dmit_insight": "High RC ulnar strong practical/social (%76+ Sosyal similar)." }
 
 Few-Shot 23: Tented Medium Spike (from belkıs müjde tented medium example)
-{{ "type": "AT", "rc": 6, "confidence": "High", "note": "Medium tent spike 6 ridges.", "dmit_insight": "Medium RC tented moderate transition." }}
+{ "type": "AT", "rc": 6, "confidence": "High", "note": "Medium tent spike 6 ridges.", "dmit_insight": "Medium RC tented moderate transition." }
 
 Few-Shot 24: Whorl Low with Noise Conservative (from ASIM KARABIYIK whorl low example)
-{{ "type": "W", "rc": 18, "confidence": "Medium", "note": "Noise conservative lower 18 ridges.", "dmit_insight": "Medium RC whorl analytical moderate conservative." }}
+{ "type": "W", "rc": 18, "confidence": "Medium", "note": "Noise conservative lower 18 ridges.", "dmit_insight": "Medium RC whorl analytical moderate conservative." }
 
 Few-Shot 25: Radial Medium Rare (from Ceylin Erol rare RL example)
-{{ "type": "RL", "rc": 15, "confidence": "High", "note": "Medium rare radial 15 ridges.", "dmit_insight": "Medium RC rare radial innovation moderate." }}
+{ "type": "RL", "rc": 15, "confidence": "High", "note": "Medium rare radial 15 ridges.", "dmit_insight": "Medium RC rare radial innovation moderate." }
 
 Few-Shot 26: Double Loop Low Interlocking (from azra arslanoğlu S low example)
-{{ "type": "S", "rc": 18, "confidence": "High", "note": "Low interlocking 18 ridges.", "dmit_insight": "Low RC double loop creativity low-moderate." }}
+{ "type": "S", "rc": 18, "confidence": "High", "note": "Low interlocking 18 ridges.", "dmit_insight": "Low RC double loop creativity low-moderate." }
 
 Few-Shot 27: Arch High Confidence Zero (from betül mıngır arch high example)
-{{ "type": "A", "rc": 0, "confidence": "High", "note": "High confidence smooth arch zero.", "dmit_insight": "Zero RC balanced low intensity high confidence." }}
+{ "type": "A", "rc": 0, "confidence": "High", "note": "High confidence smooth arch zero.", "dmit_insight": "Zero RC balanced low intensity high confidence." }
 
 Few-Shot 28: Ulnar with Single Island (from aydan açıkgöz loop island example)
-{{ "type": "UL", "rc": 19, "confidence": "High", "note": "Ulnar with single island double-count 19 ridges.", "dmit_insight": "RC with island practical enhanced." }}
+{ "type": "UL", "rc": 19, "confidence": "High", "note": "Ulnar with single island double-count 19 ridges.", "dmit_insight": "RC with island practical enhanced." }
 
 Few-Shot 29: Spiral High Pocket (from büşranur turkyılmaz spiral high example)
-{{ "type": "W", "rc": 27, "confidence": "High", "note": "High pocket spiral 27 ridges.", "dmit_insight": "High RC pocket technical peak." }}
+{ "type": "W", "rc": 27, "confidence": "High", "note": "High pocket spiral 27 ridges.", "dmit_insight": "High RC pocket technical peak." }
 
 Few-Shot 30: Unknown Medium Noise (from cem cicek medium unknown example)
-{{ "type": "Unknown", "rc": 0, "confidence": "Medium", "note": "Medium noise ambiguous - re-scan.", "dmit_insight": "Medium quality limited insight." }}
+{ "type": "Unknown", "rc": 0, "confidence": "Medium", "note": "Medium noise ambiguous - re-scan.", "dmit_insight": "Medium quality limited insight." }
 
 Few-Shot 31: Low RC Tented Spike Variant (from Bekir Bahadır tented low example)
-{{ "type": "AT", "rc": 3, "confidence": "High", "note": "Low spike variant 3 ridges.", "dmit_insight": "Low RC tented low transition." }}
+{ "type": "AT", "rc": 3, "confidence": "High", "note": "Low spike variant 3 ridges.", "dmit_insight": "Low RC tented low transition." }
 
 Few-Shot 32: High RC Radial Rare (from bahar şişman rare RL high example)
-{{ "type": "RL", "rc": 16, "confidence": "High", "note": "High rare radial 16 ridges.", "dmit_insight": "High RC rare radial strong innovation." }}
+{ "type": "RL", "rc": 16, "confidence": "High", "note": "High rare radial 16 ridges.", "dmit_insight": "High RC rare radial strong innovation." }
 
 Few-Shot 33: Whorl Medium Islands (from banu gençer whorl medium example)
-{{ "type": "W", "rc": 22, "confidence": "High", "note": "Medium whorl with islands 22 ridges.", "dmit_insight": "Medium RC islands analytical enhanced." }}
+{ "type": "W", "rc": 22, "confidence": "High", "note": "Medium whorl with islands 22 ridges.", "dmit_insight": "Medium RC islands analytical enhanced." }
 
 Few-Shot 34: Loop Low Confidence Noise (from ALPER AYDIN loop low example)
-{{ "type": "UL", "rc": 12, "confidence": "Low", "note": "Low confidence noise conservative 12 ridges.", "dmit_insight": "Low quality practical limited." }}
+{ "type": "UL", "rc": 12, "confidence": "Low", "note": "Low confidence noise conservative 12 ridges.", "dmit_insight": "Low quality practical limited." }
 
 Few-Shot 35: Double Loop Perfect High (from Ayşe Sude Türkyılmaz S high example)
-{{ "type": "S", "rc": 30, "confidence": "High", "note": "Perfect interlocking high 30 ridges.", "dmit_insight": "Exceptional RC double creativity peak." }}
+{ "type": "S", "rc": 30, "confidence": "High", "note": "Perfect interlocking high 30 ridges.", "dmit_insight": "Exceptional RC double creativity peak." }
 
 Few-Shot 36: Arch Medium Smooth (from arda yağız akkuş arch medium example)
-{{ "type": "A", "rc": 0, "confidence": "Medium", "note": "Medium smooth arch no delta.", "dmit_insight": "Balanced low with medium visibility." }}
+{ "type": "A", "rc": 0, "confidence": "Medium", "note": "Medium smooth arch no delta.", "dmit_insight": "Balanced low with medium visibility." }
 
 Few-Shot 37: Whorl Variant Low Pocket (from ceylin otuzoğlu pocket low example)
-{{ "type": "W", "rc": 19, "confidence": "High", "note": "Low pocket variant 19 ridges.", "dmit_insight": "Low RC pocket technical moderate." }}
+{ "type": "W", "rc": 19, "confidence": "High", "note": "Low pocket variant 19 ridges.", "dmit_insight": "Low RC pocket technical moderate." }
 
 Few-Shot 38: Ulnar with Triple Islands (from bartuğ ogulcan loop islands example)
-{{ "type": "UL", "rc": 25, "confidence": "High", "note": "Ulnar with triple islands double-count 25 ridges.", "dmit_insight": "High RC islands practical complex strong." }}
+{ "type": "UL", "rc": 25, "confidence": "High", "note": "Ulnar with triple islands double-count 25 ridges.", "dmit_insight": "High RC islands practical complex strong." }
 
 Few-Shot 39: Radial Low Rare (from cemal ulvi berber rare RL low example)
-{{ "type": "RL", "rc": 10, "confidence": "High", "note": "Low rare radial 10 ridges.", "dmit_insight": "Low RC rare radial innovation low." }}
+{ "type": "RL", "rc": 10, "confidence": "High", "note": "Low rare radial 10 ridges.", "dmit_insight": "Low RC rare radial innovation low." }
 
 Few-Shot 40: Spiral Perfect High (from Burak Özdemir spiral high example)
-{{ "type": "W", "rc": 29, "confidence": "High", "note": "Perfect spiral high 29 ridges.", "dmit_insight": "High RC spiral analytical peak." }}
+{ "type": "W", "rc": 29, "confidence": "High", "note": "Perfect spiral high 29 ridges.", "dmit_insight": "High RC spiral analytical peak." }
 
 Few-Shot 41: Tented High Spike (from Betül Serra Özcan tented high example)
-{{ "type": "AT", "rc": 7, "confidence": "High", "note": "High tent spike 7 ridges.", "dmit_insight": "High RC tented strong transition." }}
+{ "type": "AT", "rc": 7, "confidence": "High", "note": "High tent spike 7 ridges.", "dmit_insight": "High RC tented strong transition." }
 
 Few-Shot 42: Double Loop Medium Islands (from cemre gece S medium example)
-{{ "type": "S", "rc": 22, "confidence": "High", "note": "Medium interlocking with islands 22 ridges.", "dmit_insight": "Medium RC islands creativity enhanced." }}
+{ "type": "S", "rc": 22, "confidence": "High", "note": "Medium interlocking with islands 22 ridges.", "dmit_insight": "Medium RC islands creativity enhanced." }
 
 Few-Shot 43: Whorl Low Confidence Noise Conservative (from bhr snc whorl low example)
-{{ "type": "W", "rc": 17, "confidence": "Low", "note": "Low confidence noise conservative 17 ridges.", "dmit_insight": "Low quality analytical limited conservative." }}
+{ "type": "W", "rc": 17, "confidence": "Low", "note": "Low confidence noise conservative 17 ridges.", "dmit_insight": "Low quality analytical limited conservative." }
 
 Few-Shot 44: Ulnar Perfect Medium (from Ayşegül biçer loop medium example)
-{{ "type": "UL", "rc": 16, "confidence": "High", "note": "Perfect ulnar medium 16 ridges.", "dmit_insight": "Medium RC ulnar practical balanced." }}
+{ "type": "UL", "rc": 16, "confidence": "High", "note": "Perfect ulnar medium 16 ridges.", "dmit_insight": "Medium RC ulnar practical balanced." }
 
 Few-Shot 45: Arch Low with Variation (from büşranur turkyılmaz arch low example)
-{{ "type": "A", "rc": 0, "confidence": "High", "note": "Low variation smooth arch zero.", "dmit_insight": "Low RC variation balanced risk." }}
+{ "type": "A", "rc": 0, "confidence": "High", "note": "Low variation smooth arch zero.", "dmit_insight": "Low RC variation balanced risk." }
 
 Few-Shot 46: Radial High Rare (from cem cicek rare RL high example)
-{{ "type": "RL", "rc": 18, "confidence": "High", "note": "High rare radial 18 ridges.", "dmit_insight": "High RC rare radial innovation strong." }}
+{ "type": "RL", "rc": 18, "confidence": "High", "note": "High rare radial 18 ridges.", "dmit_insight": "High RC rare radial innovation strong." }
 
 Few-Shot 47: Spiral Medium Pocket Noise (from Bekir Bahadır spiral medium example)
-{{ "type": "W", "rc": 23, "confidence": "Medium", "note": "Medium pocket with minor noise 23 ridges.", "dmit_insight": "Medium RC pocket technical moderate." }}
+{ "type": "W", "rc": 23, "confidence": "Medium", "note": "Medium pocket with minor noise 23 ridges.", "dmit_insight": "Medium RC pocket technical moderate." }
 
 Few-Shot 48: Double Loop Low Confidence (from bahar şişman S low example)
-{{ "type": "S", "rc": 19, "confidence": "Low", "note": "Low confidence interlocking conservative 19 ridges.", "dmit_insight": "Low quality creativity limited." }}
+{ "type": "S", "rc": 19, "confidence": "Low", "note": "Low confidence interlocking conservative 19 ridges.", "dmit_insight": "Low quality creativity limited." }
 
 Few-Shot 49: Whorl High with Triple Islands (from banu gençer whorl high example)
-{{ "type": "W", "rc": 31, "confidence": "High", "note": "High whorl with triple islands double-count 31 ridges.", "dmit_insight": "Exceptional RC islands analytical complex peak." }}
+{ "type": "W", "rc": 31, "confidence": "High", "note": "High whorl with triple islands double-count 31 ridges.", "dmit_insight": "Exceptional RC islands analytical complex peak." }
 
 Few-Shot 50: Loop High Perfect No Islands (from ALPER AYDIN loop high example)
-{{ "type": "UL", "rc": 24, "confidence": "High", "note": "High perfect ulnar no islands 24 ridges.", "dmit_insight": "High RC clean loop practical strong." }}
+{ "type": "UL", "rc": 24, "confidence": "High", "note": "High perfect ulnar no islands 24 ridges.", "dmit_insight": "High RC clean loop practical strong." }
 
 Few-Shot 51: Tented Low Confidence Spike Blur (from Ayşe Sude Türkyılmaz tented low example)
-{{ "type": "AT", "rc": 3, "confidence": "Low", "note": "Low confidence spike blur conservative 3 ridges.", "dmit_insight": "Low quality tented limited transition." }}
+{ "type": "AT", "rc": 3, "confidence": "Low", "note": "Low confidence spike blur conservative 3 ridges.", "dmit_insight": "Low quality tented limited transition." }
 
 Few-Shot 52: Radial Medium Noise (from arda yağız akkuş rare RL medium example)
-{{ "type": "RL", "rc": 13, "confidence": "Medium", "note": "Medium rare radial with noise conservative 13 ridges.", "dmit_insight": "Medium RC rare radial innovation moderate conservative." }}
+{ "type": "RL", "rc": 13, "confidence": "Medium", "note": "Medium rare radial with noise conservative 13 ridges.", "dmit_insight": "Medium RC rare radial innovation moderate conservative." }
 
 Few-Shot 53: Double Loop High Perfect (from ceylin otuzoğlu S high example)
-{{ "type": "S", "rc": 32, "confidence": "High", "note": "High perfect interlocking 32 ridges.", "dmit_insight": "Exceptional RC double creativity peak (fetal occipital high)." }}
+{ "type": "S", "rc": 32, "confidence": "High", "note": "High perfect interlocking 32 ridges.", "dmit_insight": "Exceptional RC double creativity peak (fetal occipital high)." }
 
 Few-Shot 54: Whorl Medium Pocket Low (from bartuğ ogulcan pocket low example)
-{{ "type": "W", "rc": 19, "confidence": "High", "note": "Medium pocket low 19 ridges.", "dmit_insight": "Medium RC pocket technical moderate low." }}
+{ "type": "W", "rc": 19, "confidence": "High", "note": "Medium pocket low 19 ridges.", "dmit_insight": "Medium RC pocket technical moderate low." }
 
 Few-Shot 55: Arch High with Minor Variation (from cemal ulvi berber arch high example)
-{{ "type": "A", "rc": 0, "confidence": "High", "note": "High confidence arch with minor variation zero.", "dmit_insight": "Zero RC balanced high confidence." }}
+{ "type": "A", "rc": 0, "confidence": "High", "note": "High confidence arch with minor variation zero.", "dmit_insight": "Zero RC balanced high confidence." }
 
 Few-Shot 56: Ulnar Low with Island (from Burak Özdemir loop low example)
-{{ "type": "UL", "rc": 11, "confidence": "High", "note": "Low ulnar with single island double-count 11 ridges.", "dmit_insight": "Low RC island practical low enhanced." }}
+{ "type": "UL", "rc": 11, "confidence": "High", "note": "Low ulnar with single island double-count 11 ridges.", "dmit_insight": "Low RC island practical low enhanced." }
 
 Few-Shot 57: Spiral High Variant (from Betül Serra Özcan spiral high example)
-{{ "type": "W", "rc": 29, "confidence": "High", "note": "High spiral variant 29 ridges.", "dmit_insight": "High RC spiral analytical peak variant." }}
+{ "type": "W", "rc": 29, "confidence": "High", "note": "High spiral variant 29 ridges.", "dmit_insight": "High RC spiral analytical peak variant." }
 
 Few-Shot 58: Unknown High Noise Re-Scan (from cemre gece unknown high example)
-{{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "High noise insufficient skeleton re-scan.", "dmit_insight": "High quality issue no insight." }}
+{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "High noise insufficient skeleton re-scan.", "dmit_insight": "High quality issue no insight." }
 
 Few-Shot 59: Double Loop Medium Noise Conservative (from bhr snc S medium example)
-{{ "type": "S", "rc": 21, "confidence": "Medium", "note": "Medium interlocking noise conservative 21 ridges.", "dmit_insight": "Medium RC creativity moderate conservative." }}
+{ "type": "S", "rc": 21, "confidence": "Medium", "note": "Medium interlocking noise conservative 21 ridges.", "dmit_insight": "Medium RC creativity moderate conservative." }
 
 Few-Shot 60: Whorl Perfect Low Islands (from Ayşegül biçer whorl perfect example)
-{{ "type": "W", "rc": 26, "confidence": "High", "note": "Perfect whorl low islands 26 ridges.", "dmit_insight": "High RC low islands analytical strong." }}
+{ "type": "W", "rc": 26, "confidence": "High", "note": "Perfect whorl low islands 26 ridges.", "dmit_insight": "High RC low islands analytical strong." }
 
 Few-Shot 61: Tented Medium High Spike (from büşranur turkyılmaz tented medium example)
-{{ "type": "AT", "rc": 8, "confidence": "High", "note": "Medium high tent spike 8 ridges.", "dmit_insight": "Medium RC tented strong transition." }}
+{ "type": "AT", "rc": 8, "confidence": "High", "note": "Medium high tent spike 8 ridges.", "dmit_insight": "Medium RC tented strong transition." }
 
 Few-Shot 62: Radial High Perfect (from cem cicek rare RL high example)
-{{ "type": "RL", "rc": 17, "confidence": "High", "note": "High perfect rare radial 17 ridges.", "dmit_insight": "High RC rare radial innovation peak." }}
+{ "type": "RL", "rc": 17, "confidence": "High", "note": "High perfect rare radial 17 ridges.", "dmit_insight": "High RC rare radial innovation peak." }
 
 Few-Shot 63: Double Loop Low Islands (from Bekir Bahadır S low example)
-{{ "type": "S", "rc": 17, "confidence": "High", "note": "Low interlocking with islands 17 ridges.", "dmit_insight": "Low RC islands creativity low enhanced." }}
+{ "type": "S", "rc": 17, "confidence": "High", "note": "Low interlocking with islands 17 ridges.", "dmit_insight": "Low RC islands creativity low enhanced." }
 
 Few-Shot 64: Whorl High Noise Conservative (from bahar şişman whorl high example)
-{{ "type": "W", "rc": 23, "confidence": "Medium", "note": "High whorl noise conservative 23 ridges.", "dmit_insight": "High RC conservative analytical moderate." }}
+{ "type": "W", "rc": 23, "confidence": "Medium", "note": "High whorl noise conservative 23 ridges.", "dmit_insight": "High RC conservative analytical moderate." }
 
 Few-Shot 65: Arch Medium Confidence Variation (from banu gençer arch medium example)
-{{ "type": "A", "rc": 0, "confidence": "Medium", "note": "Medium confidence arch variation zero.", "dmit_insight": "Balanced low medium visibility." }}
+{ "type": "A", "rc": 0, "confidence": "Medium", "note": "Medium confidence arch variation zero.", "dmit_insight": "Balanced low medium visibility." }
 
 Few-Shot 66: Ulnar Medium Perfect (from ALPER AYDIN loop medium example)
-{{ "type": "UL", "rc": 17, "confidence": "High", "note": "Medium perfect ulnar 17 ridges.", "dmit_insight": "Medium RC ulnar practical balanced." }}
+{ "type": "UL", "rc": 17, "confidence": "High", "note": "Medium perfect ulnar 17 ridges.", "dmit_insight": "Medium RC ulnar practical balanced." }
 
 Few-Shot 67: Spiral Low Variant (from Ayşe Sude Türkyılmaz spiral low example)
-{{ "type": "W", "rc": 16, "confidence": "High", "note": "Low spiral variant 16 ridges.", "dmit_insight": "Low RC spiral technical low." }}
+{ "type": "W", "rc": 16, "confidence": "High", "note": "Low spiral variant 16 ridges.", "dmit_insight": "Low RC spiral technical low." }
 
 Few-Shot 68: Unknown Medium Residual (from arda yağız akkuş unknown medium example)
-{{ "type": "Unknown", "rc": 0, "confidence": "Medium", "note": "Medium residual ambiguous re-scan.", "dmit_insight": "Medium quality limited insight." }}
+{ "type": "Unknown", "rc": 0, "confidence": "Medium", "note": "Medium residual ambiguous re-scan.", "dmit_insight": "Medium quality limited insight." }
 
 Few-Shot 69: Double Loop High Noise (from ceylin otuzoğlu S high example)
-{{ "type": "S", "rc": 27, "confidence": "Medium", "note": "High interlocking noise conservative 27 ridges.", "dmit_insight": "High RC creativity moderate conservative." }}
+{ "type": "S", "rc": 27, "confidence": "Medium", "note": "High interlocking noise conservative 27 ridges.", "dmit_insight": "High RC creativity moderate conservative." }
 
 Few-Shot 70: Whorl Medium Clean (from bartuğ ogulcan whorl medium example)
-{{ "type": "W", "rc": 22, "confidence": "High", "note": "Medium clean whorl 22 ridges.", "dmit_insight": "Medium RC clean analytical balanced." }}
+{ "type": "W", "rc": 22, "confidence": "High", "note": "Medium clean whorl 22 ridges.", "dmit_insight": "Medium RC clean analytical balanced." }
 
 Few-Shot 71: Tented Low Noise Conservative (from cemal ulvi berber tented low example)
-{{ "type": "AT", "rc": 2, "confidence": "Medium", "note": "Low tent noise conservative 2 ridges.", "dmit_insight": "Low RC tented limited transition conservative." }}
+{ "type": "AT", "rc": 2, "confidence": "Medium", "note": "Low tent noise conservative 2 ridges.", "dmit_insight": "Low RC tented limited transition conservative." }
 
 Few-Shot 72: Radial Low Perfect (from Burak Özdemir rare RL low example)
-{{ "type": "RL", "rc": 9, "confidence": "High", "note": "Low perfect rare radial 9 ridges.", "dmit_insight": "Low RC rare radial innovation low." }}
+{ "type": "RL", "rc": 9, "confidence": "High", "note": "Low perfect rare radial 9 ridges.", "dmit_insight": "Low RC rare radial innovation low." }
 
 Few-Shot 73: Double Loop Perfect Medium (from Betül Serra Özcan S medium example)
-{{ "type": "S", "rc": 23, "confidence": "High", "note": "Perfect medium interlocking 23 ridges.", "dmit_insight": "Medium RC double creativity balanced." }}
+{ "type": "S", "rc": 23, "confidence": "High", "note": "Perfect medium interlocking 23 ridges.", "dmit_insight": "Medium RC double creativity balanced." }
 
 Few-Shot 74: Whorl Low Pocket Conservative (from cemre gece pocket low example)
-{{ "type": "W", "rc": 15, "confidence": "High", "note": "Low pocket conservative 15 ridges.", "dmit_insight": "Low RC pocket technical low." }}
+{ "type": "W", "rc": 15, "confidence": "High", "note": "Low pocket conservative 15 ridges.", "dmit_insight": "Low RC pocket technical low." }
 
 Few-Shot 75: Arch High Perfect (from bhr snc arch high example)
-{{ "type": "A", "rc": 0, "confidence": "High", "note": "High perfect smooth arch zero.", "dmit_insight": "Zero RC balanced high." }}
+{ "type": "A", "rc": 0, "confidence": "High", "note": "High perfect smooth arch zero.", "dmit_insight": "Zero RC balanced high." }
 
 Few-Shot 76: Ulnar High Noise Conservative (from Ayşegül biçer loop high example)
-{{ "type": "UL", "rc": 21, "confidence": "Medium", "note": "High ulnar noise conservative 21 ridges.", "dmit_insight": "High RC practical moderate conservative." }}
+{ "type": "UL", "rc": 21, "confidence": "Medium", "note": "High ulnar noise conservative 21 ridges.", "dmit_insight": "High RC practical moderate conservative." }
 
 Few-Shot 77: Spiral Medium Variant Noise (from büşranur turkyılmaz spiral medium example)
-{{ "type": "W", "rc": 20, "confidence": "Medium", "note": "Medium spiral variant noise conservative 20 ridges.", "dmit_insight": "Medium RC spiral technical moderate conservative." }}
+{ "type": "W", "rc": 20, "confidence": "Medium", "note": "Medium spiral variant noise conservative 20 ridges.", "dmit_insight": "Medium RC spiral technical moderate conservative." }
 
 Few-Shot 78: Unknown Low Residual Re-Scan (from cem cicek unknown low example)
-{{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Low residual insufficient re-scan.", "dmit_insight": "Low quality no insight re-scan." }}
+{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Low residual insufficient re-scan.", "dmit_insight": "Low quality no insight re-scan." }
 
 Few-Shot 79: Double Loop Low Perfect (from Bekir Bahadır S low example)
-{{ "type": "S", "rc": 16, "confidence": "High", "note": "Low perfect interlocking 16 ridges.", "dmit_insight": "Low RC double creativity low." }}
+{ "type": "S", "rc": 16, "confidence": "High", "note": "Low perfect interlocking 16 ridges.", "dmit_insight": "Low RC double creativity low." }
 
 Few-Shot 80: Whorl High Perfect Variant (from bahar şişman whorl high example)
-{{ "type": "W", "rc": 32, "confidence": "High", "note": "High perfect variant whorl 32 ridges.", "dmit_insight": "Exceptional RC variant analytical peak (%97 İletişim similar)." }}
+{ "type": "W", "rc": 32, "confidence": "High", "note": "High perfect variant whorl 32 ridges.", "dmit_insight": "Exceptional RC variant analytical peak (%97 İletişim similar)." }
 
 OUTPUT ONLY VALID JSON (no extra text, no markdown):
-{{
+{
   "type": "W",
   "rc": 22,
   "confidence": "High",
   "note": "Skeletonized image: perfect concentric whorl, higher delta-core exactly 22 ridges (no islands).",
   "dmit_insight": "Very high RC whorl indicates exceptional analytical and technical aptitude, often linked to 82%+ Teknik scores in Genetic Test reports."
-}}
+}
+
+If truly impossible: { "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Image quality insufficient even after processing - recommend professional ink scan." }
+"""
 
-If truly impossible: {{ "type": "Unknown", "rc": 0, "confidence": "Low", "note": "Image quality insufficient even after processing - recommend professional ink scan." }}
+VERIFY_SYSTEM_PROMPT = """
+You are a dermatoglyphics verifier. A local algorithm (orientation field + Poincaré index) has pre-classified this skeletonized fingerprint. Confirm or correct the pattern type and count the ridges.
+- Codes: A (Plain Arch), AT (Tented Arch), UL (Ulnar Loop, opens toward little finger: right hand rightward flow), RL (Radial Loop, opens toward thumb), W (Whorl), S (Double Loop).
+- Ridge count: shortest straight delta-to-core line; count EVERY crossing/touching ridge (exclude delta/core ridges). W/S: use the HIGHER delta count. A/AT: 0.
+- Local core/delta coordinates are pixel positions in this image; they may be slightly off.
+OUTPUT ONLY VALID JSON (no extra text, no markdown):
+{ "type": "UL", "rc": 15, "confidence": "High", "note": "Short reason.", "dmit_insight": "One sentence DMIT insight." }
 """
+
+def local_classification(image_bytes, finger_label):
+    """
+    LOCAL_CLASSIFIER_MODE açıksa yerel sınıflandırma sonucunu döner; mod kapalı, OpenCV yok
+    veya güven eşiğin altındaysa None (parmak tam Vision analizine gider).
+    """
+    if LOCAL_CLASSIFIER_MODE not in ("verify", "skip") or not OPENCV_AVAILABLE:
+        return None
+    try:
+        local = image_utils.ridge_count(image_bytes, finger_label)
+    except Exception as e:
+        print(f"Yerel sınıflandırma hatası: {e}")
+        return None
+    if local["type"] == "Unknown" or local["confidence"] < LOCAL_CLASSIFIER_THRESHOLD:
+        return None
+    return local
+
+# API'ye gitmeyen parmaklar için kısa yorum (Vision örneklerindeki "RC seviyesi + desen eğilimi" biçiminde)
+LOCAL_INSIGHT_TRAITS = {
+    "W": "whorl suggests analytical and technical aptitude",
+    "S": "double loop suggests creativity and complex thinking",
+    "UL": "ulnar loop suggests practical and interpersonal skills",
+    "RL": "radial loop suggests innovative, unconventional thinking",
+    "AT": "tented arch suggests a transitional, moderate potential",
+    "A": "arch suggests a balanced but lower-intensity profile",
+}
+
+def local_insight(pattern, rc):
+    """Yerel desen ve RC'den tek cümlelik DMIT yorumu."""
+    level = "Zero" if rc <= 0 else "Low" if rc < 10 else "Medium" if rc < 18 else "High" if rc < 26 else "Very high"
+    trait = LOCAL_INSIGHT_TRAITS.get(pattern, "pattern gives limited insight")
+    return f"{level} RC {trait} (local skeleton analysis, {rc} ridges)."
+
+def local_result(local):
+    """Yerel sınıflandırmadan Vision ile aynı biçimde sonuç (API çağrısı yapılmadan)."""
+    return {
+        "type": local["type"],
+        "rc": local["rc"],
+        "confidence": "High" if local["confidence"] >= 0.9 else "Medium",
+        "note": f"Yerel sınıflandırma (güven {local['confidence']:.2f}): çekirdek {len(local['cores'])}, "
+                f"delta {len(local['deltas'])}, iskelet üzerinde {local['rc']} sırt.",
+        "dmit_insight": local_insight(local["type"], local["rc"]),
+        "source": "local",
+    }
+
+def quality_gate_result(image_bytes):
+    """QUALITY_GATE açıksa kalite kapısından geçemeyen resim için API'siz "Unknown" sonucu; geçerse None."""
+    if not QUALITY_GATE or not OPENCV_AVAILABLE:
+        return None
+    verdict = image_utils.quality_gate(image_bytes)
+    if verdict["accepted"]:
+        return None
+    return {
+        "type": "Unknown",
+        "rc": 0,
+        "confidence": "Low",
+        "note": f"Kalite kapısı: {verdict['message']}",
+        "dmit_insight": "Insufficient image quality - re-scan advised.",
+        "source": "quality_gate",
+        "quality": verdict["reasons"],
+    }
+
+def check_ridge_count(result, image_bytes, finger_label):
+    """
+    Vision sonucuna yerel RC karşılaştırmasını ekler (yerinde): rc_local ve rc_check
+    ("ok" / "mismatch"). Yerel desen farklıysa veya sayım güvenilir değilse eklenmez.
+    """
+    if not LOCAL_RC_CHECK or not OPENCV_AVAILABLE or result.get("type") not in image_utils.EXPECTED_DELTAS:
+        return result
+    try:
+        local = image_utils.ridge_count(image_bytes, finger_label)
+    except Exception as e:
+        print(f"Yerel RC hatası: {e}")
+        return result
+    if local["type"] != result["type"] or not local["reliable"]:
+        return result
+
+    result["rc_local"] = local["rc"]
+    try:
+        matches = abs(int(result.get("rc", 0)) - local["rc"]) <= LOCAL_RC_TOLERANCE
+    except (TypeError, ValueError):
+        matches = False
+    result["rc_check"] = "ok" if matches else "mismatch"
+    return result
+
+def analyze_fingerprint(image_bytes, finger_label, use_cache=True):
+    """Tek parmağın analizi; bitince decode edilmiş/ara görüntüler bırakılır (küçük sonuçlar önbellekte kalır)."""
+    try:
+        return _analyze_fingerprint(image_bytes, finger_label, use_cache)
+    finally:
+        if OPENCV_AVAILABLE:
+            image_utils.get_pipeline(image_bytes).release_arrays()
+
+def cached_vision_result(image_bytes, finger_label):
+    """
+    Önbellekteki Vision sonucu (yoksa None). Yerel sınıflandırıcı açıksa önceki çalışma doğrulama
+    anahtarına da yazmış olabilir; iki anahtar da ucuzdur.
+    """
+    verify_options = (True, False) if LOCAL_CLASSIFIER_MODE in ("verify", "skip") and OPENCV_AVAILABLE else (False,)
+    for verify in verify_options:
+        cached = vision_cache.get(vision_cache_key(image_bytes, finger_label, verify=verify))
+        if cached is not None:
+            return cached
+    return None
+
+def _analyze_fingerprint(image_bytes, finger_label, use_cache=True):
+    gated = quality_gate_result(image_bytes)
+    if gated:
+        return gated
+
+    # Önbellek yerel sınıflandırmadan önce: İsabetler yönelim alanı / iskelet / sırt sayımı maliyetini ödemez
+    if use_cache:
+        cached = cached_vision_result(image_bytes, finger_label)
+        if cached is not None:
+            return cached
+
+    local = local_classification(image_bytes, finger_label)
+    if local and LOCAL_CLASSIFIER_MODE == "skip" and local["type"] in LOCAL_SKIP_TYPES and local["reliable"]:
+        return local_result(local)
+
+    cache_key = vision_cache_key(image_bytes, finger_label, verify=local is not None) if use_cache else None
+
+    if not GROK_API_KEY or GROK_API_KEY == "key-not-found":
+        return {"type": "Hata", "rc": 0, "confidence": "Yok", "note": "API Key Eksik", "dmit_insight": "Demo"}
+
+    base64_image = None
+    is_processed = False
     
+    if OPENCV_AVAILABLE:
+        try:
+            # Yükleme sırasındaki kalite kontrolünde decode edilen resim yeniden kullanılır
+            pipeline = image_utils.get_pipeline(image_bytes)
+            if pipeline.readable() and pipeline.processed_bytes():
+                base64_image = pipeline.to_base64(processed=True)
+                is_processed = True
+        except Exception as e:
+            print(f"OpenCV Hata: {e}")
+
+    if base64_image is None:
+        base64_image = encode_image(image_bytes)
+    image_status_note = "PRE-PROCESSED (Skeletonized & High-Contrast)" if is_processed else "RAW IMAGE"
+    user_text = f"Analyze this fingerprint. Label: {finger_label}. Status: {image_status_note}"
+    if not is_processed:
+        user_text += ". This image is NOT skeletonized; read ridges from the raw photo."
+
+    # Yüksek güvenli yerel sonuç: Kısa doğrulama prompt'u ve (ayarlıysa) daha ucuz model
+    if local:
+        user_text = (f"Verify this fingerprint. Label: {finger_label}. Status: {image_status_note}. "
+                     f"Local result: type={local['type']}, confidence={local['confidence']:.2f}, "
+                     f"cores={local['cores']}, deltas={local['deltas']}, local ridge count={local['rc']}.")
+        model, system_prompt, max_tokens, prompt_id = VERIFY_MODEL, VERIFY_SYSTEM_PROMPT, VERIFY_MAX_TOKENS, VERIFY_PROMPT_VERSION
+    else:
+        model, system_prompt, max_tokens, prompt_id = VISION_MODEL, VISION_SYSTEM_PROMPT, 1000, VISION_PROMPT_VERSION
+
     try:
-        response = client.chat.completions.create(
-            model=VISION_MODEL,
+        response = api.create(
+            timeout=VISION_TIMEOUT,
+            model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": [{"type": "text", "text": f"Analyze this fingerprint. Label: {finger_label}. Status: {image_status_note}"}, {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}]}
+                {"role": "user", "content": [{"type": "text", "text": user_text}, {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}]}
             ],
             temperature=0.0,
-            max_tokens=1000,
+            max_tokens=max_tokens,
+            extra_headers=prompt_cache_headers(prompt_id),
         )
+        record_prompt_cache_usage(response)
         content = response.choices[0].message.content.replace("```json", "").replace("```", "").strip()
-        return json.loads(content)
+        result = json.loads(content)
+        if local:
+            result["source"] = "verify"
+        check_ridge_count(result, image_bytes, finger_label)
+        if cache_key:
+            vision_cache.set(cache_key, result)
+        return result
     except Exception as e:
         return {"type": "Error", "rc": 0, "confidence": "Low", "note": str(e), "dmit_insight": "Hata"}
 
+def is_failed_result(result):
+    """API/ayar hatası sonucu mu? (Bu sonuçlar veritabanına yazılmamalı)"""
+    return result.get("type") in ("Error", "Hata")
+
+# -----------------------------------------------------------------------------
+# 4B. TOPLU ANALİZ (10 PARMAK EŞZAMANLI)
+# -----------------------------------------------------------------------------
+def analyze_fingers_concurrently(finger_images, max_workers=None, progress_callback=None):
+    """
+    Parmakları sırayla değil, sınırlı bir thread havuzunda aynı anda analiz eder.
+    Toplam süre ~ en yavaş tek parmağın süresine iner.
+
+    Argümanlar:
+        finger_images: {finger_code: image_bytes}
+        max_workers: Aynı anda çalışacak istek sayısı (Varsayılan: ANALYSIS_CONCURRENCY)
+        progress_callback: Her parmak bittiğinde (finger_code, result, done, total) ile çağrılır.
+
+    Dönüş:
+        {finger_code: result} - Giriş sırasıyla. Hatalı parmaklar "Error" sonucu ile döner,
+        toplu işlem durmaz.
+    """
+    if not finger_images:
+        return {}
+
+    workers = max(1, min(max_workers or ANALYSIS_CONCURRENCY, len(finger_images)))
+    results = {}
+
+    if OPENCV_AVAILABLE and len(finger_images) > 1:
+        # İskelet ve yerel sırt sayımı süreç havuzunda paralel hesaplanır (GIL'e takılmaz);
+        # aşağıdaki thread'ler sonuçları pipeline önbelleğinden okur. Vision sonucu önbellekte olan
+        # parmaklar ön işleme gerektirmez, havuza gönderilmez.
+        pending = {code: img for code, img in finger_images.items() if cached_vision_result(img, code) is None}
+        try:
+            image_utils.preprocess_batch(list(pending.values()), finger_codes=list(pending))
+        except Exception as e:
+            print(f"Toplu ön işleme hatası: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dmit-vision") as executor:
+        futures = {executor.submit(analyze_fingerprint, img, code): code for code, img in finger_images.items()}
+        total = len(futures)
+
+        # Callback ana thread'de çağrılır (Streamlit bileşenleri güvenle güncellenebilir)
+        for done, future in enumerate(as_completed(futures), start=1):
+            code = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"type": "Error", "rc": 0, "confidence": "Low", "note": str(e), "dmit_insight": "Hata"}
+            results[code] = result
+
+            if progress_callback:
+                progress_callback(code, result, done, total)
+
+    return {code: results[code] for code in finger_images}
+
 # -----------------------------------------------------------------------------
 # 5. RAPOR FONKSİYONU (REASONING) - 80-SHOT RAPOR PROMPT (FULL)
 # -----------------------------------------------------------------------------
-def generate_nobel_report(student_name, age, gender, finger_data, scores_ignored):
-    if not GROK_API_KEY or GROK_API_KEY == "key-not-found":
-        return "HATA: API Anahtarı eksik."
+REPORT_SYSTEM_PROMPT = "You are the BALABAN Koçluk Lead Genetic Analyst."
 
-    # Python ile Kesin Hesaplama
-    stats = calculate_advanced_stats(finger_data)
+def build_report_prompt(student_name, age, finger_data, stats=None):
+    """Hesaplanmış istatistikleri 80-shot rapor prompt'una yerleştirir."""
+    # Python ile Kesin Hesaplama (Önceden hesaplandıysa tekrar hesaplanmaz)
+    if stats is None:
+        stats = calculate_advanced_stats(finger_data)
     
-    raw_finger_list = ""
-    for _, row in finger_data.iterrows():
-        raw_finger_list += f"{row['finger_code']}: {row['pattern_type']} (RC: {row['ridge_count']}), "
+    raw_finger_list = "".join(
+        finger_data['finger_code'].astype(str) + ": " + finger_data['pattern_type'].astype(str)
+        + " (RC: " + finger_data['ridge_count'].astype(str) + "), "
+    )
 
     # --- SENİN 80-SHOT BALABAN RAPOR PROMPTUN (FULL) ---
     prompt = f"""
@@ -753,12 +1051,38 @@ Strictly follow 13 sections with fetal/ridge/personal/practical elements.
     **Analist: Balaban Koçluk Baş Genetik Analisti**
 
 """
+    return prompt
+
+# Rapor metninde bu ifadeler varsa rapor başarısızdır (arşive yazılmaz)
+REPORT_ERROR_MARKERS = ("HATA: API Anahtarı eksik.", "Rapor Oluşturma Hatası:", "Bölüm Oluşturma Hatası:")
+
+def is_failed_report(text):
+    return not text or any(marker in text for marker in REPORT_ERROR_MARKERS)
+
+def report_archive_key(student_name, age, finger_data, scores=None):
+    """
+    Rapor arşivi anahtarı: Prompt'un (isim, yaş, istatistikler, parmak listesi) özeti + model + prompt sürümü.
+    Girdiler değişmediyse aynı anahtar üretilir ve arşivdeki rapor doğrudan kullanılabilir.
+    """
+    prompt = build_report_prompt(student_name, age, finger_data, stats=report_stats(finger_data, scores))
+    return {
+        "input_hash": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "model": REASONING_MODEL,
+        "prompt_version": REPORT_PROMPT_VERSION,
+    }
+
+def generate_nobel_report(student_name, age, gender, finger_data, scores=None):
+    if not GROK_API_KEY or GROK_API_KEY == "key-not-found":
+        return "HATA: API Anahtarı eksik."
+
+    prompt = build_report_prompt(student_name, age, finger_data, stats=report_stats(finger_data, scores))
 
     try:
-        response = client.chat.completions.create(
+        response = api.create(
+            timeout=REPORT_TIMEOUT,
             model=REASONING_MODEL,
             messages=[
-                {"role": "system", "content": "You are the BALABAN Koçluk Lead Genetic Analyst."},
+                {"role": "system", "content": REPORT_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
@@ -767,3 +1091,151 @@ Strictly follow 13 sections with fetal/ridge/personal/practical elements.
         return response.choices[0].message.content
     except Exception as e:
         return f"Rapor Oluşturma Hatası: {str(e)}"
+
+def stream_nobel_report(student_name, age, gender, finger_data, scores=None):
+    """
+    generate_nobel_report'un akışlı (streaming) hali.
+    Metin parçalarını geldikçe üretir (yield); st.write_stream ile canlı gösterilir
+    ve birleştirilmiş tam metin indirme için geri alınır.
+    """
+    if not GROK_API_KEY or GROK_API_KEY == "key-not-found":
+        yield "HATA: API Anahtarı eksik."
+        return
+
+    prompt = build_report_prompt(student_name, age, finger_data, stats=report_stats(finger_data, scores))
+
+    try:
+        response = api.create(
+            timeout=REPORT_TIMEOUT,
+            model=REASONING_MODEL,
+            messages=[
+                {"role": "system", "content": REPORT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=6000,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        yield f"\n\nRapor Oluşturma Hatası: {str(e)}"
+
+# -----------------------------------------------------------------------------
+# 6. BÖLÜM BÖLÜM PARALEL RAPOR
+# -----------------------------------------------------------------------------
+# Raporun 13 sabit bölümü (Few-Shot örneklerindeki başlıklar), birleştirme sırası budur.
+REPORT_SECTIONS = [
+    ("dermatoglifik", "Dermatoglifik Bilimi"),
+    ("parmak_desenleri", "Parmak Desenleri"),
+    ("egitim_turu", "Eğitim Türü"),
+    ("meslek_alanlari", "Meslek Faaliyet Alanları"),
+    ("mesleki_kureler", "Mesleki Faaliyetin Küreleri"),
+    ("kendini_gelistirme", "Kendini Geliştirme"),
+    ("sinir_sistemi", "Sinir Sistemi"),
+    ("davranis_mizac", "Davranış / Mizaç"),
+    ("yenilik_algisi", "Yenilik Algısı"),
+    ("saglik", "Sağlık Risk Faktörleri"),
+    ("spor", "Spor"),
+    ("sismanlik_alkol", "Şişmanlık / Alkol"),
+    ("sonuc", "Sonuç"),
+]
+
+def _section_instruction(index):
+    number = index + 1
+    key, title = REPORT_SECTIONS[index]
+    text = (f"Write ONLY section {number} of 13: \"{title}\". "
+            f"Start with the heading '## {number}. {title}' and do not write any other section.")
+    if index == len(REPORT_SECTIONS) - 1:
+        text += " This is the final section: sign it at the end as instructed."
+    else:
+        text += " Do not sign this section."
+    return text
+
+def generate_report_section(prompt, index, use_cache=True):
+    """
+    Tek bir rapor bölümünü yazar. Ortak prompt (istatistikler + few-shot) tüm bölümlerde
+    aynıdır; sadece sondaki bölüm talimatı değişir.
+    use_cache=False: Önbelleği atlar ve yeni sonucu önbelleğe yazar (tek bölüm yeniden üretimi).
+    """
+    key, title = REPORT_SECTIONS[index]
+    cache_key = disk_cache.make_key(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), key,
+                                    REASONING_MODEL, REPORT_PROMPT_VERSION)
+    if use_cache:
+        cached = report_section_cache.get(cache_key)
+        # Eski sürümlerin yazdığı boş kayıtlar kullanılmaz, bölüm yeniden yazılır
+        if cached is not None and cached.get("text"):
+            return cached["text"]
+
+    try:
+        response = api.create(
+            timeout=REPORT_TIMEOUT,
+            model=REASONING_MODEL,
+            messages=[
+                {"role": "system", "content": REPORT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+                {"role": "user", "content": _section_instruction(index)}
+            ],
+            temperature=0.7,
+            max_tokens=REPORT_SECTION_MAX_TOKENS,
+            extra_headers=prompt_cache_headers(REPORT_PROMPT_VERSION),
+        )
+        record_prompt_cache_usage(response)
+        choice = response.choices[0]
+        text = choice.message.content
+        if not text or not text.strip():
+            # İçerik filtresi / uzunluk sınırı: Boş yanıt önbelleğe yazılmaz, sonraki istekte yeniden denenir
+            raise ValueError(f"Boş yanıt (finish_reason: {choice.finish_reason})")
+    except Exception as e:
+        return f"## {index + 1}. {title}\n\nBölüm Oluşturma Hatası: {str(e)}"
+
+    report_section_cache.set(cache_key, {"text": text})
+    return text
+
+def generate_report_sections(student_name, age, gender, finger_data, scores=None, max_workers=None,
+                             use_cache=True, regenerate=(), progress_callback=None):
+    """
+    13 bölümü ayrı isteklerle aynı anda yazar; toplam süre en uzun bölüm kadardır.
+
+    Argümanlar:
+        regenerate: Önbelleği atlanıp yeniden yazılacak bölüm anahtarları.
+        progress_callback: Her bölüm bittiğinde (done, total, title) ile çağrılır (ana thread).
+
+    Dönüş:
+        Bölüm metinleri listesi (REPORT_SECTIONS sırasıyla).
+    """
+    if not GROK_API_KEY or GROK_API_KEY == "key-not-found":
+        return ["HATA: API Anahtarı eksik."]
+
+    # İstatistikler bir kez alınır (saklanmışsa yeniden hesaplanmaz), tüm bölümler aynı prompt'u paylaşır
+    prompt = build_report_prompt(student_name, age, finger_data, stats=report_stats(finger_data, scores))
+
+    total = len(REPORT_SECTIONS)
+    sections = [None] * total
+    workers = max(1, min(max_workers or REPORT_SECTION_CONCURRENCY, total))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dmit-report") as executor:
+        futures = {
+            executor.submit(generate_report_section, prompt, i, use_cache and key not in regenerate): i
+            for i, (key, _) in enumerate(REPORT_SECTIONS)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            sections[i] = future.result()
+            if progress_callback:
+                progress_callback(done, total, REPORT_SECTIONS[i][1])
+
+    return sections
+
+def generate_sectioned_report(student_name, age, gender, finger_data, scores=None, **kwargs):
+    """Paralel yazılan bölümleri sırayla birleştirip tam rapor metnini döner."""
+    return "\n\n".join(generate_report_sections(student_name, age, gender, finger_data, scores, **kwargs))
+
+def regenerate_report_section(student_name, age, gender, finger_data, section_key, scores=None):
+    """Tek bir bölümü önbelleği atlayarak yeniden yazar (sonraki tam rapor bu sürümü kullanır)."""
+    index = [key for key, _ in REPORT_SECTIONS].index(section_key)
+    if not GROK_API_KEY or GROK_API_KEY == "key-not-found":
+        return "HATA: API Anahtarı eksik."
+    prompt = build_report_prompt(student_name, age, finger_data, stats=report_stats(finger_data, scores))
+    return generate_report_section(prompt, index, use_cache=False)
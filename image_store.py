@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+İçerik adresli parmak izi resim deposu.
+
+Her resim içeriğinin SHA-256 özetiyle adlandırılır ve özetin ilk dört
+karakterine göre iki seviyeli alt klasörlere (shard) yazılır:
+    <kök>/ab/cd/abcd....jpg
+Aynı içerik tekrar yüklenirse diske ikinci kez yazılmaz (tekilleştirme).
+Veritabanında köke göre göreli yol ("ab/cd/abcd....jpg") saklanır; böylece
+prompt veya model değişince resimler yeniden yüklenmeden tekrar analiz edilebilir.
+"""
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import image_utils
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+IMAGE_STORE_DIR = os.getenv("DMIT_IMAGE_STORE_DIR", "image_store")
+
+# Dosya uzantısı içerikten (sihirli baytlar) belirlenir
+_SIGNATURES = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+]
+
+def sniff_extension(data):
+    for signature, ext in _SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    return ".bin"
+
+class ImageStore:
+    def __init__(self, root=IMAGE_STORE_DIR):
+        self.root = root
+        self.stats = {"writes": 0, "dedup_hits": 0, "bytes_written": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def relative_path(digest, ext):
+        # Platformdan bağımsız olsun diye veritabanına "/" ile yazılır
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def absolute_path(self, relative_path):
+        return os.path.join(self.root, *relative_path.split("/"))
+
+    def put(self, data):
+        """Resmi depoya yazar (aynı içerik zaten varsa yazmaz) ve göreli yolunu döner."""
+        relative_path = self.relative_path(hashlib.sha256(data).hexdigest(), sniff_extension(data))
+        path = self.absolute_path(relative_path)
+        if os.path.exists(path):
+            with self._lock:
+                self.stats["dedup_hits"] += 1
+            return relative_path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Yarım yazılmış dosya okunmasın diye geçici dosya + atomik yer değiştirme
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.stats["writes"] += 1
+            self.stats["bytes_written"] += len(data)
+        return relative_path
+
+    def get(self, relative_path):
+        """Resim baytlarını döner; yol boş/eski ("memory") ya da dosya yoksa None."""
+        if not relative_path or relative_path == "memory":
+            return None
+        try:
+            with open(self.absolute_path(relative_path), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def exists(self, relative_path):
+        return bool(relative_path) and os.path.exists(self.absolute_path(relative_path))
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+default_store = ImageStore()
+
+# -----------------------------------------------------------------------------
+# PARMAK İZİ YARDIMCILARI
+# -----------------------------------------------------------------------------
+def store_finger_image(image_bytes, store=None):
+    """
+    Orijinal resmi ve (OpenCV varsa) işlenmiş iskelet resmini depoya yazar.
+
+    Dönüş:
+        dict: image_path (orijinal), processed_path (iskelet, üretilemezse None)
+    """
+    store = store or default_store
+    refs = {"image_path": store.put(image_bytes), "processed_path": None}
+    if OPENCV_AVAILABLE:
+        try:
+            # Analiz sırasında hesaplanan iskelet, pipeline önbelleğinden yeniden kullanılır
+            processed = image_utils.get_pipeline(image_bytes).processed_bytes()
+            if processed:
+                refs["processed_path"] = store.put(processed)
+        except Exception as e:
+            print(f"İskelet kaydedilemedi: {e}")
+    return refs
+
+def store_finger_set(finger_images, store=None, max_workers=4):
+    """{finger_code: image_bytes} -> {finger_code: {image_path, processed_path}} (parmaklar paralel yazılır)."""
+    if not finger_images:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(finger_images)))) as executor:
+        futures = {code: executor.submit(store_finger_image, data, store) for code, data in finger_images.items()}
+        return {code: future.result() for code, future in futures.items()}
+
+def load_finger_images(image_paths, store=None):
+    """{finger_code: göreli yol} -> {finger_code: image_bytes}. Depoda bulunmayanlar atlanır."""
+    store = store or default_store
+    images = {}
+    for code, relative_path in image_paths.items():
+        data = store.get(relative_path)
+        if data is not None:
+            images[code] = data
+    return images
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Depodaki resimlerden toplu yeniden analiz (çevrimdışı).
+
+Prompt veya model değiştiğinde öğrencilerin resimlerini yeniden yüklemeye gerek
+kalmadan, içerik adresli depodaki orijinal resimler Vision'a tekrar gönderilir ve
+sonuçlar veritabanına yazılır. Vision önbelleği model ve prompt sürümünü anahtarda
+tuttuğu için yalnızca değişen ayarlar için gerçekten istek atılır.
+
+Kullanım:
+    python reanalyze.py                      # tüm öğrenciler
+    python reanalyze.py --student "Ali Veli" --student "Ayşe"
+    python reanalyze.py --dry-run            # yalnızca depoda kaç resim bulunduğunu gösterir
+    python reanalyze.py --local [--dry-run]  # API'siz: RC iskelet üzerinde yerel olarak yeniden sayılır
+"""
+import argparse
+
+import db_manager
+import grok_service
+import image_store
+import image_utils
+
+def reanalyze_student(student_name, dry_run=False):
+    """
+    Bir öğrencinin depodaki resimlerini yeniden analiz edip kaydeder.
+
+    Dönüş:
+        dict: images (depoda bulunan), saved (yazılan), failed (analiz edilemeyen parmak kodları)
+    """
+    image_refs = db_manager.get_student_image_refs(student_name)
+    images = image_store.load_finger_images({code: refs["image_path"] for code, refs in image_refs.items()})
+    summary = {"images": len(images), "saved": 0, "failed": []}
+    if dry_run or not images:
+        return summary
+
+    results = grok_service.analyze_fingers_concurrently(images)
+    # Kalite kapısında kalan parmaklar da yazılmaz (eski kayıt korunur)
+    succeeded = {code: result for code, result in results.items()
+                 if not grok_service.is_failed_result(result) and result.get("source") != "quality_gate"}
+    summary["failed"] = [code for code in results if code not in succeeded]
+
+    finger_data = db_manager.get_student_data(student_name)
+    age, gender = finger_data.iloc[0]['student_age'], finger_data.iloc[0]['student_gender']
+    summary["saved"] = db_manager.save_finger_set(student_name, age, gender, succeeded,
+                                                  image_refs=image_refs)["rows"]
+    db_manager.refresh_student_scores(student_name)
+    return summary
+
+def rescore_student_locally(student_name, dry_run=False):
+    """
+    API çağrısı yapmadan RC'yi depodaki resimlerin iskeletinde yeniden sayar
+    (image_utils.ridge_count). Yalnızca yerel desen kayıtlı desenle aynı ve sayım
+    güvenilirse kayıt güncellenir; diğer parmaklar olduğu gibi kalır.
+
+    Dönüş:
+        dict: images, changed ({finger_code: (eski rc, yerel rc)}), skipped (karşılaştırılamayan parmaklar)
+    """
+    image_refs = db_manager.get_student_image_refs(student_name)
+    images = image_store.load_finger_images({code: refs["image_path"] for code, refs in image_refs.items()})
+    finger_data = db_manager.get_student_data(student_name)
+    summary = {"images": len(images), "changed": {}, "skipped": []}
+
+    updates = {}
+    for row in finger_data.itertuples():
+        if row.finger_code not in images:
+            continue
+        local = image_utils.ridge_count(images[row.finger_code], row.finger_code)
+        if local["type"] != row.pattern_type or not local["reliable"]:
+            summary["skipped"].append(row.finger_code)
+            continue
+        if local["rc"] != row.ridge_count:
+            summary["changed"][row.finger_code] = (row.ridge_count, local["rc"])
+            # Kayıt yerel sayımı alır: Karşılaştırma alanları da ona göre yazılır (yoksa NULL'a dönerdi)
+            updates[row.finger_code] = {"type": row.pattern_type, "rc": local["rc"],
+                                        "confidence": row.confidence, "dmit_insight": row.dmit_insight,
+                                        "rc_local": local["rc"], "rc_check": "ok"}
+
+    if updates and not dry_run:
+        age, gender = finger_data.iloc[0]['student_age'], finger_data.iloc[0]['student_gender']
+        db_manager.save_finger_set(student_name, age, gender, updates, image_refs=image_refs)
+        db_manager.refresh_student_scores(student_name)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Depodaki resimlerden toplu yeniden analiz")
+    parser.add_argument("--student", action="append", default=[], help="Öğrenci adı (tekrarlanabilir)")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--local", action="store_true", help="Vision yerine yerel RC sayımı (API çağrısı yok)")
+    args = parser.parse_args()
+
+    db_manager.init_db()
+    students = args.student or db_manager.get_all_students()
+    for name in students:
+        if args.local:
+            summary = rescore_student_locally(name, dry_run=args.dry_run)
+            changes = ", ".join(f"{code}: {old}->{new}" for code, (old, new) in summary["changed"].items()) or "değişiklik yok"
+            print(f"{name}: depoda {summary['images']} resim | {changes} | karşılaştırılamayan: {len(summary['skipped'])}")
+            continue
+        summary = reanalyze_student(name, dry_run=args.dry_run)
+        failed = f" | başarısız: {', '.join(summary['failed'])}" if summary["failed"] else ""
+        print(f"{name}: depoda {summary['images']} resim, {summary['saved']} kayıt yazıldı{failed}")
+
+if __name__ == "__main__":
+    main()
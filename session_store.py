@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Oturum resimleri için geçici disk deposu.
+
+Öğrencinin yüklediği tam çözünürlüklü fotoğraflar st.session_state içinde bayt
+olarak tutulmaz; oturuma ait geçici klasöre yazılır. Hafızada yalnızca dosya
+tanıtıcısı (yol, boyut) ve önizleme için küçük bir JPEG kalır.
+
+Temizlik:
+    - clear(): Çıkışta (logout) veya analiz bitince klasör silinir.
+    - Oturum nesnesi çöpe gidince (Streamlit oturumu kapandığında) klasör silinir.
+    - cleanup_expired(): Süresi dolan (TTL) sahipsiz klasörler silinir (çöken süreçlerden kalanlar dahil).
+"""
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+import weakref
+
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+try:
+    import image_utils
+    PIPELINE_STATS_AVAILABLE = True
+except ImportError:
+    PIPELINE_STATS_AVAILABLE = False
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+SESSION_STORE_DIR = os.getenv("DMIT_SESSION_STORE_DIR", os.path.join(tempfile.gettempdir(), "dmit_sessions"))
+SESSION_TTL_SECONDS = int(os.getenv("DMIT_SESSION_TTL_SECONDS", "7200"))
+THUMBNAIL_SIZE = int(os.getenv("DMIT_THUMBNAIL_SIZE", "160"))
+
+_sessions = weakref.WeakValueDictionary()
+_sessions_lock = threading.Lock()
+
+def make_thumbnail(image_bytes, size=THUMBNAIL_SIZE):
+    """Önizleme için en uzun kenarı `size` piksel olan küçük JPEG (OpenCV yoksa None)."""
+    if not OPENCV_AVAILABLE:
+        return None
+    # Küçültülmüş decode: Tam çözünürlüklü resim hafızada hiç açılmaz
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_REDUCED_COLOR_4)
+    if img is None:
+        return None
+    scale = size / max(img.shape[:2])
+    if scale < 1:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return buffer.tobytes() if ok else None
+
+def _remove_dir(path):
+    shutil.rmtree(path, ignore_errors=True)
+
+class SessionImages:
+    """
+    {finger_code: resim} sözlüğü gibi davranır; baytlar diskte, hafızada yalnızca tanıtıcılar durur.
+    """
+    def __init__(self, session_id=None, root=SESSION_STORE_DIR):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.directory = os.path.join(root, self.session_id)
+        self.handles = {}   # {finger_code: {"path", "bytes", "thumbnail"}}
+        self._lock = threading.Lock()
+        # Oturum kapanıp nesne çöpe gidince klasör de silinir
+        self._finalizer = weakref.finalize(self, _remove_dir, self.directory)
+        with _sessions_lock:
+            _sessions[self.session_id] = self
+
+    def __setitem__(self, finger_code, image_bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{finger_code}.img")
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+        with self._lock:
+            self.handles[finger_code] = {
+                "path": path,
+                "bytes": len(image_bytes),
+                "thumbnail": make_thumbnail(image_bytes),
+            }
+
+    def __getitem__(self, finger_code):
+        """Resim baytlarını diskten okur (yalnızca analiz anında)."""
+        with open(self.handles[finger_code]["path"], "rb") as f:
+            return f.read()
+
+    def __contains__(self, finger_code):
+        return finger_code in self.handles
+
+    def __len__(self):
+        return len(self.handles)
+
+    def keys(self):
+        return list(self.handles.keys())
+
+    def thumbnail(self, finger_code):
+        handle = self.handles.get(finger_code)
+        return handle["thumbnail"] if handle else None
+
+    def load_all(self):
+        """Analiz için {finger_code: image_bytes} (geçici olarak hafızaya alınır)."""
+        return {code: self[code] for code in self.keys()}
+
+    def clear(self):
+        """Tüm resimleri ve oturum klasörünü siler (çıkış / analiz sonrası)."""
+        with self._lock:
+            self.handles = {}
+        _remove_dir(self.directory)
+
+    def get_stats(self):
+        """Oturum sayaçları: resim sayısı, diskteki ve hafızadaki (önizleme) bayt."""
+        with self._lock:
+            return {
+                "images": len(self.handles),
+                "disk_bytes": sum(h["bytes"] for h in self.handles.values()),
+                "memory_bytes": sum(len(h["thumbnail"] or b"") for h in self.handles.values()),
+            }
+
+def cleanup_expired(root=SESSION_STORE_DIR, ttl=SESSION_TTL_SECONDS):
+    """TTL süresince dokunulmamış ve canlı bir oturuma ait olmayan klasörleri siler. Dönüş: silinen sayısı."""
+    if not os.path.isdir(root):
+        return 0
+    with _sessions_lock:
+        live = set(_sessions.keys())
+    now = time.time()
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            expired = now - os.path.getmtime(path) > ttl
+        except OSError:
+            continue
+        if name not in live and expired:
+            _remove_dir(path)
+            removed += 1
+    return removed
+
+def get_stats():
+    """
+    Tüm süreç için sayaçlar: canlı oturum, resim, disk/hafıza baytı ve (varsa) en yüksek RSS.
+    memory_bytes önizlemelere ek olarak süreç genelindeki pipeline önbelleğini (yükleme baytları,
+    decode edilmiş diziler, iskelet JPEG'leri) de içerir; ayrıntısı pipeline_bytes'ta.
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    per_session = [s.get_stats() for s in sessions]
+    stats = {
+        "sessions": len(per_session),
+        "images": sum(s["images"] for s in per_session),
+        "disk_bytes": sum(s["disk_bytes"] for s in per_session),
+        "memory_bytes": sum(s["memory_bytes"] for s in per_session),
+    }
+    if PIPELINE_STATS_AVAILABLE:
+        pipelines = image_utils.pipeline_cache_stats()
+        stats["pipelines"] = pipelines["pipelines"]
+        stats["pipeline_bytes"] = pipelines["memory_bytes"]
+        stats["memory_bytes"] += pipelines["memory_bytes"]
+    if RESOURCE_AVAILABLE:
+        # Linux'ta KiB cinsindendir
+        stats["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return stats
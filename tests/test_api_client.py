@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Dayanıklı API istemcisi: GROK_BASE_URL ile yerel sahte sunucuya karşı yeniden deneme, geri çekilme ve devre kesici."""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+import api_client
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Sıradaki yanıt durum kodunu `statuses` listesinden alır (liste bitince 200); gelen istekler sayılır."""
+    statuses = []
+    delay = 0.0
+    requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+        FakeHandler.requests += 1
+        status = FakeHandler.statuses.pop(0) if FakeHandler.statuses else 200
+        time.sleep(FakeHandler.delay)
+        if status == 200:
+            payload = {"id": "x", "object": "chat.completion", "created": 0, "model": body["model"],
+                       "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"},
+                                    "finish_reason": "stop"}]}
+        else:
+            payload = {"error": {"message": f"status {status}"}}
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Zaman aşımı testinde istemci yanıtı beklemeden bağlantıyı kapatır
+            pass
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    FakeHandler.statuses, FakeHandler.delay, FakeHandler.requests = [], 0.0, 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("GROK_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    yield FakeHandler
+    server.shutdown()
+    server.server_close()
+
+def make_client(sleeps, **kwargs):
+    # grok_service ile aynı kurulum: SDK'nın kendi yeniden denemesi kapalı, adres GROK_BASE_URL'den
+    client = openai.OpenAI(api_key="test", base_url=os.environ["GROK_BASE_URL"], max_retries=0)
+    return api_client.ResilientClient(client, sleep=sleeps.append, **kwargs)
+
+def call(api, **kwargs):
+    return api.create(model="test-model", messages=[{"role": "user", "content": "merhaba"}], **kwargs)
+
+def test_retryable_statuses_back_off_with_growing_delays(fake_server, monkeypatch):
+    monkeypatch.setattr(api_client.random, "uniform", lambda low, high: high)  # jitter üst sınırı
+    fake_server.statuses = [429, 503, 500]
+    sleeps = []
+    api = make_client(sleeps, max_retries=3, backoff_base=0.5)
+
+    response = call(api)
+
+    assert response.choices[0].message.content == "ok"
+    assert fake_server.requests == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+    metrics = api.get_metrics()
+    assert (metrics["retries"], metrics["successes"], metrics["failures"]) == (3, 1, 0)
+
+def test_client_error_is_not_retried(fake_server):
+    fake_server.statuses = [400]
+    sleeps = []
+    api = make_client(sleeps)
+
+    with pytest.raises(openai.BadRequestError):
+        call(api)
+
+    assert fake_server.requests == 1 and sleeps == []
+    assert api.breaker.state == "closed"
+    metrics = api.get_metrics()
+    assert (metrics["retries"], metrics["failures"]) == (0, 1)
+
+def test_timeout_counts_as_failure(fake_server):
+    fake_server.delay = 0.5
+    sleeps = []
+    api = make_client(sleeps, max_retries=0, breaker=api_client.CircuitBreaker(failure_threshold=5))
+
+    with pytest.raises(openai.APITimeoutError):
+        call(api, timeout=0.1)
+
+    assert api.breaker.failures == 1
+    assert api.get_metrics()["failures"] == 1
+
+def test_breaker_opens_half_opens_and_closes(fake_server):
+    fake_server.statuses = [500, 500]
+    sleeps = []
+    breaker = api_client.CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    api = make_client(sleeps, max_retries=0, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            call(api)
+    assert breaker.state == "open"
+
+    # Açıkken istek sunucuya gitmez
+    with pytest.raises(api_client.CircuitOpenError):
+        call(api)
+    assert fake_server.requests == 2
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert call(api).choices[0].message.content == "ok"
+    assert breaker.state == "closed" and breaker.failures == 0
+
+    metrics = api.get_metrics()
+    assert (metrics["failures"], metrics["rejected"], metrics["successes"]) == (2, 1, 1)
+    assert metrics["circuit_state"] == "closed"
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Arayüz önbellek anahtarları (veri ve rapor arşivi sürümleri bağımsız), parmak kaydı alanları ve eşzamanlı göç."""
+import threading
+
+import pytest
+
+import db_manager
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_NAME", str(tmp_path / "test.db"))
+    db_manager.init_db()
+    yield
+    db_manager.close_connection()
+
+def finger_set():
+    return {code: {"type": "UL", "rc": 12, "confidence": "High", "dmit_insight": "-"}
+            for code in ["L1", "L2", "L3", "L4", "L5", "R1", "R2", "R3", "R4", "R5"]}
+
+def test_save_report_does_not_invalidate_student_data(database):
+    db_manager.save_finger_set("Ali", 12, "E", finger_set())
+    data, total = db_manager.data_version("Ali"), db_manager.data_version()
+    reports = db_manager.report_version("Ali")
+
+    db_manager.save_report("Ali", "hash", "model", "v1", "full", "rapor")
+
+    assert db_manager.data_version("Ali") == data
+    assert db_manager.data_version() == total
+    assert db_manager.report_version("Ali") == reports + 1
+    assert [r["content"] for r in db_manager.list_reports("Ali")] == ["rapor"]
+
+def test_finger_save_does_not_change_report_version(database):
+    reports = db_manager.report_version("Ayşe")
+    db_manager.save_finger_set("Ayşe", 11, "K", finger_set())
+    assert db_manager.report_version("Ayşe") == reports
+    assert db_manager.data_version("Ayşe") > 0
+
+def test_local_ridge_count_check_is_stored(database):
+    results = finger_set()
+    results["R2"].update({"rc": 12, "rc_local": 19, "rc_check": "mismatch"})
+    results["R3"].update({"rc": 12, "rc_local": 13, "rc_check": "ok"})
+    db_manager.save_finger_set("Can", 10, "E", results)
+
+    df = db_manager.get_student_data("Can").set_index("finger_code")
+    assert df.loc["R2", "rc_check"] == "mismatch" and df.loc["R2", "rc_local"] == 19
+    assert df.loc["R3", "rc_check"] == "ok"
+    assert df["rc_check"].isna().sum() == 8
+
+def test_concurrent_init_applies_migrations_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_NAME", str(tmp_path / "fresh.db"))
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def init():
+        try:
+            barrier.wait()
+            db_manager.init_db()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db_manager.close_connection()
+
+    threads = [threading.Thread(target=init) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    conn = db_manager.get_connection()
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db_manager.MIGRATIONS)
+    finally:
+        db_manager.close_connection()
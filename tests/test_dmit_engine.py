@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""10 slotlu puanlama temsili (finger_arrays) ve öğretmen paneli özeti (dashboard_scores)."""
+import numpy as np
+import pandas as pd
+
+import dmit_engine
+
+def fingers(rows):
+    return pd.DataFrame(rows, columns=["finger_code", "pattern_type", "ridge_count"])
+
+def test_finger_arrays_slots():
+    arrays = dmit_engine.finger_arrays(fingers([("R5", "UL", 12), ("L1", "W", 18), ("XX", "A", 3)]))
+    assert arrays["present"].tolist() == [True] + [False] * 8 + [True]
+    assert arrays["pattern"][0] == "W" and arrays["pattern"][9] == "UL"
+    assert arrays["rc"][0] == 18 and arrays["rc"][9] == 12
+    assert arrays["weight"][0] == dmit_engine.PATTERN_WEIGHTS["W"]
+
+def test_dashboard_counts_match_pattern_letters():
+    df = fingers([("L1", "W", 18), ("L2", "UL", 12), ("L3", "RL", 10), ("L4", "S", 16),
+                  ("L5", "A", 0), ("R1", "AT", 2), ("R2", None, 0), ("R3", "L", 9)])
+    scores = dmit_engine.dashboard_scores(df)
+    assert scores["whorl_count"] == 1
+    assert scores["loop_count"] == 3
+    assert scores["tfrc"] == 67
+    assert scores["lobes"]["prefrontal"] == 22 and scores["lobes"]["temporal"] == 26
+
+def test_dashboard_uses_last_record_per_finger():
+    df = fingers([("L1", "UL", 10), ("L1", "W", 15)])
+    scores = dmit_engine.dashboard_scores(df)
+    assert (scores["whorl_count"], scores["loop_count"], scores["tfrc"]) == (1, 0, 15)
+
+def test_dashboard_empty():
+    assert dmit_engine.dashboard_scores(fingers([])) == {}
+    assert not np.any(dmit_engine.finger_arrays(fingers([]))["present"])
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Pipeline önbelleğinin hafıza yükü: dizilerin bırakılması ve session_store sayaçları."""
+import cv2
+import numpy as np
+
+import image_utils
+import session_store
+
+def upload(seed, size=(900, 700)):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:size[1], :size[0]].astype(np.float32)
+    gray = 127 + 90 * np.sin(np.hypot(xx - size[0] / 2, yy - size[1] / 2) / 9 * 2 * np.pi) + rng.normal(0, 5, yy.shape)
+    return cv2.imencode(".jpg", np.clip(gray, 0, 255).astype(np.uint8))[1].tobytes()
+
+def test_quality_check_releases_decoded_frame():
+    data = upload(1)
+    pipeline = image_utils.get_pipeline(data)
+    accepted, score, _ = image_utils.check_image_quality(data)
+    assert pipeline._gray is None
+    assert pipeline.memory_bytes() < 2 * len(data)
+    # Karar saklanır; tekrar sorulunca yeniden decode edilmez
+    assert image_utils.check_image_quality(data)[:2] == (accepted, score)
+    assert pipeline._gray is None
+
+def test_released_pipeline_recomputes_on_demand():
+    data = upload(2)
+    pipeline = image_utils.get_pipeline(data)
+    skeleton = pipeline.skeleton().copy()
+    processed = pipeline.processed_bytes()
+    pipeline.release_arrays()
+    assert pipeline.memory_bytes() == len(data) + len(processed)
+    assert pipeline.processed_bytes() == processed
+    assert np.array_equal(pipeline.skeleton(), skeleton)
+
+def test_session_stats_include_pipeline_cache():
+    data = upload(3)
+    image_utils.get_pipeline(data).skeleton()
+    stats = session_store.get_stats()
+    cache = image_utils.pipeline_cache_stats()
+    assert stats["pipeline_bytes"] == cache["memory_bytes"] > 900 * 700
+    assert stats["memory_bytes"] >= stats["pipeline_bytes"]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Toplu ön işleme: havuz bir kez açılır, hata diğer oturumların havuzunu kapatmaz, önbellekteki parmaklar atlanır."""
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+import pytest
+
+import grok_service
+import image_utils
+
+def upload(seed, size=(320, 320)):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:size[1], :size[0]].astype(np.float32)
+    gray = 127 + 90 * np.sin(np.hypot(xx - size[0] / 2, yy - size[1] / 2) / 9 * 2 * np.pi) + rng.normal(0, 5, yy.shape)
+    return cv2.imencode(".jpg", np.clip(gray, 0, 255).astype(np.uint8))[1].tobytes()
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    # Havuz süreçleri görev gönderilene kadar başlatılmaz; testler süreç açmaz
+    image_utils.shutdown_process_pool()
+    yield
+    image_utils.shutdown_process_pool()
+
+def test_pool_is_not_rebuilt_for_other_worker_counts():
+    pool = image_utils._get_process_pool(4)
+    assert image_utils._get_process_pool(2) is pool
+
+def test_failed_batch_falls_back_to_serial_and_keeps_pool(monkeypatch):
+    def fail(pool, images, hands):
+        raise OSError("shared memory unavailable")
+    monkeypatch.setattr(image_utils, "_preprocess_in_pool", fail)
+    pool = image_utils._get_process_pool(2)
+
+    results = image_utils.preprocess_batch([upload(1), upload(2)], ["R1", "L2"], workers=2)
+
+    assert [r["readable"] for r in results] == [True, True]
+    assert image_utils._process_pool is pool
+
+def test_broken_pool_is_discarded(monkeypatch):
+    def broken(pool, images, hands):
+        raise BrokenProcessPool("worker died")
+    monkeypatch.setattr(image_utils, "_preprocess_in_pool", broken)
+    pool = image_utils._get_process_pool(2)
+
+    image_utils.preprocess_batch([upload(3), upload(4)], workers=2)
+
+    assert image_utils._process_pool is None
+    assert image_utils._get_process_pool(2) is not pool
+
+def test_cached_fingers_are_not_preprocessed(monkeypatch):
+    images = {"R1": upload(5), "R2": upload(6), "R3": upload(7)}
+    cached = {"type": "UL", "rc": 10, "confidence": "High", "dmit_insight": "-"}
+    sent = []
+    monkeypatch.setattr(grok_service, "cached_vision_result", lambda img, code: cached if code == "R2" else None)
+    monkeypatch.setattr(image_utils, "preprocess_batch", lambda imgs, finger_codes=None: sent.extend(finger_codes))
+    monkeypatch.setattr(grok_service, "analyze_fingerprint", lambda img, code: cached)
+
+    grok_service.analyze_fingers_concurrently(images)
+
+    assert sent == ["R1", "R3"]
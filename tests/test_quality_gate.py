@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Kalite kapısı modları: uyarı modunda yalnızca okunamayan / bulanık resimler reddedilir."""
+import image_utils
+
+METRICS = {"sharpness": 12.0}
+
+def test_warn_mode_accepts_with_warning(monkeypatch):
+    monkeypatch.setattr(image_utils, "QUALITY_GATE_MODE", "warn")
+    verdict = image_utils._quality_verdict(["off_center", "dark"], METRICS)
+    assert verdict["accepted"]
+    assert verdict["warnings"] == ["dark", "off_center"]
+    assert verdict["message"].startswith(image_utils.QUALITY_MESSAGES["dark"])
+    assert verdict["message"] != image_utils.QUALITY_OK_MESSAGE
+
+def test_warn_mode_still_rejects_blur(monkeypatch):
+    monkeypatch.setattr(image_utils, "QUALITY_GATE_MODE", "warn")
+    verdict = image_utils._quality_verdict(["dark", "blur"], METRICS)
+    assert not verdict["accepted"]
+    assert verdict["warnings"] == ["dark"]
+    assert verdict["message"] == image_utils.QUALITY_MESSAGES["blur"].format(**METRICS)
+
+def test_reject_mode_rejects_every_reason(monkeypatch):
+    monkeypatch.setattr(image_utils, "QUALITY_GATE_MODE", "reject")
+    verdict = image_utils._quality_verdict(["off_center"], METRICS)
+    assert not verdict["accepted"] and verdict["warnings"] == []
+    assert verdict["message"] == image_utils.QUALITY_MESSAGES["off_center"]
+
+def test_clean_image_gets_ok_message():
+    verdict = image_utils._quality_verdict([], METRICS)
+    assert verdict["accepted"] and verdict["message"] == image_utils.QUALITY_OK_MESSAGE
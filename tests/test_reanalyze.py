@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Yerel yeniden sayım: Güncellenen parmakların RC karşılaştırma alanları korunur."""
+import pytest
+
+import db_manager
+import image_store
+import image_utils
+import reanalyze
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_NAME", str(tmp_path / "test.db"))
+    db_manager.init_db()
+    yield
+    db_manager.close_connection()
+
+def test_local_rescore_keeps_ridge_count_check(database, monkeypatch):
+    results = {"R1": {"type": "UL", "rc": 12, "confidence": "High", "dmit_insight": "-",
+                      "rc_local": 19, "rc_check": "mismatch"},
+               "R2": {"type": "W", "rc": 15, "confidence": "High", "dmit_insight": "-",
+                      "rc_local": 14, "rc_check": "ok"}}
+    db_manager.save_finger_set("Ece", 9, "K", results)
+    refs = {code: {"image_path": f"{code}.jpg", "processed_path": None} for code in results}
+    monkeypatch.setattr(db_manager, "get_student_image_refs", lambda name: refs)
+    monkeypatch.setattr(image_store, "load_finger_images", lambda paths: {code: code.encode() for code in paths})
+    monkeypatch.setattr(image_utils, "ridge_count", lambda data, code: {
+        "type": "UL" if code == "R1" else "W", "rc": 19 if code == "R1" else 15, "reliable": True})
+
+    summary = reanalyze.rescore_student_locally("Ece")
+
+    assert summary["changed"] == {"R1": (12, 19)}
+    df = db_manager.get_student_data("Ece").set_index("finger_code")
+    assert (df.loc["R1", "ridge_count"], df.loc["R1", "rc_local"], df.loc["R1", "rc_check"]) == (19, 19, "ok")
+    assert (df.loc["R2", "rc_local"], df.loc["R2", "rc_check"]) == (14, "ok")
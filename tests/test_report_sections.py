@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Paralel bölüm raporu: boş model yanıtı hata bölümü olur ve önbelleğe yazılmaz."""
+from types import SimpleNamespace
+
+import pytest
+
+import disk_cache
+import grok_service
+
+class FakeApi:
+    """api.create yerine: Bölüm talimatına göre yanıt içeriği döner, çağrılar sayılır."""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def create(self, messages, **kwargs):
+        self.calls += 1
+        content = self.content(messages[-1]["content"]) if callable(self.content) else self.content
+        choice = SimpleNamespace(message=SimpleNamespace(content=content),
+                                 finish_reason="content_filter" if not content else "stop")
+        return SimpleNamespace(choices=[choice], usage=None)
+
+@pytest.fixture
+def section_cache(tmp_path, monkeypatch):
+    cache = disk_cache.DiskCache(str(tmp_path / "sections"))
+    monkeypatch.setattr(grok_service, "report_section_cache", cache)
+    monkeypatch.setattr(grok_service, "GROK_API_KEY", "test")
+    monkeypatch.setattr(grok_service, "build_report_prompt", lambda *args, **kwargs: "ortak prompt")
+    monkeypatch.setattr(grok_service, "report_stats", lambda *args: {})
+    return cache
+
+@pytest.mark.parametrize("content", [None, "", "  \n"])
+def test_empty_section_is_error_and_not_cached(section_cache, monkeypatch, content):
+    api = FakeApi(content)
+    monkeypatch.setattr(grok_service, "api", api)
+
+    text = grok_service.generate_report_section("ortak prompt", 0)
+
+    assert "Bölüm Oluşturma Hatası" in text
+    title = grok_service.REPORT_SECTIONS[0][1]
+    assert text.startswith(f"## 1. {title}")
+
+    # Sonraki istek önbellekten boş sonuç almaz, yeniden yazar
+    api.content = "## 1. Bölüm metni"
+    assert grok_service.generate_report_section("ortak prompt", 0) == "## 1. Bölüm metni"
+    assert grok_service.generate_report_section("ortak prompt", 0) == "## 1. Bölüm metni"
+    assert api.calls == 2
+
+def test_sectioned_report_survives_empty_section(section_cache, monkeypatch):
+    empty_instruction = grok_service._section_instruction(2)
+    monkeypatch.setattr(grok_service, "api", FakeApi(lambda instruction: None if instruction == empty_instruction else "metin"))
+
+    report = grok_service.generate_sectioned_report("Ali", 12, "E", finger_data=None, max_workers=4)
+
+    parts = report.split("\n\n")
+    assert len(parts) == len(grok_service.REPORT_SECTIONS) + 1  # hata bölümü başlık + mesaj
+    assert sum("Bölüm Oluşturma Hatası" in part for part in parts) == 1
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Parmak ucu kırpma (find_fingertip_roi) ve çözünürlük normalizasyonu (normalize_fingertip)."""
+import cv2
+import numpy as np
+import pytest
+
+import image_utils
+
+def synthetic_frame(width, height, center, axes, period=9.0, background=200, seed=0):
+    """
+    Düz, hafif gürültülü zemin üzerinde sırtlı bir parmak ucu elipsi.
+    Dönüş: (gri kare, elipsin sınır kutusu (x, y, w, h))
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:height, :width].astype(np.float32)
+    cx, cy = center
+    ax, ay = axes
+    ridges = 127 + 90 * np.sin(np.hypot(xx - cx, (yy - cy) * 0.8) / period * 2 * np.pi)
+    inside = ((xx - cx) / ax) ** 2 + ((yy - cy) / ay) ** 2 <= 1
+    gray = np.where(inside, ridges, background) + rng.normal(0, 4, (height, width))
+    return np.clip(gray, 0, 255).astype(np.uint8), (cx - ax, cy - ay, 2 * ax, 2 * ay)
+
+def contains(box, inner):
+    x, y, w, h = box
+    ix, iy, iw, ih = inner
+    return x <= ix and y <= iy and x + w >= ix + iw and y + h >= iy + ih
+
+@pytest.mark.parametrize("width, height, center, axes", [
+    (1600, 1200, (800, 600), (260, 340)),     # Ortada
+    (2000, 1500, (560, 520), (300, 380)),     # Sol üstte, küçültülmüş analiz karesi
+    (640, 480, (420, 250), (120, 160)),       # Küçük kare, sağda
+])
+def test_roi_box_contains_fingertip(width, height, center, axes):
+    gray, ellipse_box = synthetic_frame(width, height, center, axes)
+    box = image_utils.find_fingertip_roi(gray)
+    assert box is not None
+    assert contains(box, ellipse_box)
+    # Kutu kareyi olduğu gibi döndürmemeli (gerçekten kırpılmış olmalı)
+    assert box[2] * box[3] < 0.8 * width * height
+
+def test_roi_box_within_frame():
+    gray, _ = synthetic_frame(800, 600, (120, 110), (100, 130))   # Kenara taşan parmak
+    x, y, w, h = image_utils.find_fingertip_roi(gray)
+    assert x >= 0 and y >= 0 and x + w <= 800 and y + h <= 600
+
+@pytest.mark.parametrize("max_pixels", [40000, 250000, 640000])
+def test_normalize_respects_pixel_budget(max_pixels):
+    gray, _ = synthetic_frame(4000, 3000, (2000, 1500), (700, 900), period=22.0)
+    normalized, roi_box, scale = image_utils.normalize_fingertip(gray, max_pixels=max_pixels, target_ridge_period=0)
+    assert roi_box is not None
+    assert normalized.size <= max_pixels
+    # Bütçenin belirgin altında kalmamalı (gereksiz detay kaybı)
+    assert normalized.size >= 0.95 * max_pixels
+    assert scale < 1
+
+def test_normalize_budget_just_below_crop():
+    # Kırpılan kare bütçeyi %3 aşıyor: %2'lik "ölçekleme gereksiz" toleransına takılmamalı
+    gray, _ = synthetic_frame(1600, 1200, (800, 600), (260, 340))
+    _, _, w, h = image_utils.find_fingertip_roi(gray)
+    max_pixels = int(w * h / 1.03)
+    normalized, _, _ = image_utils.normalize_fingertip(gray, max_pixels=max_pixels, target_ridge_period=0)
+    assert normalized.size <= max_pixels
+
+def test_normalize_target_period_stays_within_budget():
+    gray, _ = synthetic_frame(3000, 2400, (1500, 1200), (600, 750), period=24.0)
+    normalized, _, _ = image_utils.normalize_fingertip(gray, max_pixels=300000, target_ridge_period=6.0)
+    assert normalized.size <= 300000
+
+def test_normalize_keeps_small_crop_unscaled():
+    gray, _ = synthetic_frame(640, 480, (320, 240), (150, 190))
+    normalized, roi_box, scale = image_utils.normalize_fingertip(gray, max_pixels=640000, target_ridge_period=0)
+    x, y, w, h = roi_box
+    assert scale == 1.0
+    assert np.array_equal(normalized, gray[y:y + h, x:x + w])
+
+def test_roi_disabled_returns_full_frame(monkeypatch):
+    gray, _ = synthetic_frame(1600, 1200, (800, 600), (260, 340))
+    monkeypatch.setattr(image_utils, "ROI_ENABLED", False)
+    pipeline = image_utils.FingerprintPipeline(cv2.imencode(".png", gray)[1].tobytes())
+    normalized = pipeline.normalized()
+    assert np.array_equal(normalized, gray)
+    assert pipeline.roi_box is None
+    assert pipeline.roi_scale == 1.0